@@ -0,0 +1,73 @@
+from time import perf_counter
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+from .tiered_cache import TwoTierCache
+
+_MISSING = object()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = metrics.current()
+        if stats is None:
+            return super().render(context, request)
+        stats.template_depth += 1
+        started = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django, время отрисовки которых попадает в метрики."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class CacheStatsMixin:
+    """Считает попадания и промахи get/get_many для метрик запроса."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        stats = metrics.current()
+        if stats is not None and not stats.cache_depth:
+            if value is _MISSING:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        stats = metrics.current()
+        if stats is None:
+            return super().get_many(keys, version)
+        keys = list(keys)
+        # Базовый get_many зовёт get для каждого ключа: их не считаем.
+        stats.cache_depth += 1
+        try:
+            values = super().get_many(keys, version)
+        finally:
+            stats.cache_depth -= 1
+        if not stats.cache_depth:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+
+
+class InstrumentedLocMemCache(CacheStatsMixin, LocMemCache):
+    pass
+
+
+class InstrumentedTwoTierCache(CacheStatsMixin, TwoTierCache):
+    pass
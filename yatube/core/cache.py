@@ -0,0 +1,253 @@
+import math
+import random
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (get_cache_key, get_max_age, has_vary_header,
+                                learn_cache_key, patch_cache_control)
+from django.views.decorators.http import condition
+
+from .routers import pinned, primary_reads
+
+VERSION_KEY = 'page_version:{}'
+LEASE_KEY = 'lease:{}'
+# Аренда пересчёта живёт LEASE_TIME секунд; пока она взята, остальные
+# получают устаревшее значение. Без него ждут не дольше LEASE_WAIT,
+# проверяя кэш каждые LEASE_POLL, и дальше считают сами: медленный
+# пересчёт не должен надолго занимать потоки воркера.
+LEASE_TIME = 10
+LEASE_WAIT = 1.5
+LEASE_POLL = 0.05
+# Столько секунд после срока значение ещё лежит в кэше как устаревшее.
+STALE_TIME = 60
+# Чем больше, тем раньше до срока начинается вероятностное обновление.
+EARLY_REFRESH_BETA = 1.0
+
+
+def _new_version():
+    # Версия от времени, а не с единицы: если ключ версии вытеснят из кэша,
+    # старые страницы не всплывут под совпавшим номером.
+    return int(time.time() * 1000)
+
+
+def page_version(*scopes):
+    """Общая версия набора областей, например ('posts', 'group:cats').
+
+    Области — теги зависимостей: страница или значение, собранное под
+    их версией, сбрасывается bump() любой из них без перебора ключей.
+    """
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def _increment(scopes):
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def bump(*scopes):
+    """Сбрасывает страницы областей сменой их версии.
+
+    Внутри транзакции версия меняется ещё раз после коммита, чтобы
+    страница, собранная параллельным запросом до коммита, не осталась
+    в кэше под новой версией.
+    """
+    scopes = set(scopes)
+    _increment(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _increment(scopes))
+
+
+def _fresh(entry, beta):
+    # XFetch: чем дороже пересчёт и ближе срок, тем вероятнее обновить
+    # значение заранее одному запросу, пока остальные получают кэш.
+    value, expires, delta = entry
+    return time.time() - delta * beta * math.log(
+        1 - random.random()
+    ) < expires
+
+
+def _wait(key):
+    deadline = time.monotonic() + LEASE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LEASE_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _store(key, value, timeout, started):
+    now = time.time()
+    cache.set(key, (
+        value, math.inf if timeout is None else now + timeout, now - started
+    ), None if timeout is None else timeout + STALE_TIME)
+
+
+def get_or_compute(key, compute, timeout, beta=EARLY_REFRESH_BETA):
+    """Значение из кэша или compute() без лавины одновременных пересчётов.
+
+    Пересчитывает тот, кто взял аренду ключа; остальные получают
+    устаревшее значение, а если его нет — ждут результат до LEASE_WAIT
+    и затем считают сами.
+    Если compute() вернул None, значение не кэшируется.
+    """
+    entry = cache.get(key)
+    if entry is not None and _fresh(entry, beta):
+        return entry[0]
+    lease = LEASE_KEY.format(key)
+    leased = cache.add(lease, True, LEASE_TIME)
+    if not leased:
+        entry = entry or _wait(key)
+        if entry is not None:
+            return entry[0]
+    try:
+        started = time.time()
+        with primary_reads():
+            value = compute()
+        if value is not None:
+            _store(key, value, timeout, started)
+        return value
+    finally:
+        if leased:
+            cache.delete(lease)
+
+
+def peek(key):
+    """Значение get_or_compute без пересчёта, возможно устаревшее."""
+    entry = cache.get(key)
+    return None if entry is None else entry[0]
+
+
+def _cacheable_timeout(request, response, timeout):
+    """Срок кэширования ответа по правилам UpdateCacheMiddleware."""
+    if response.streaming or response.status_code != 200:
+        return None
+    if (not request.COOKIES and response.cookies
+            and has_vary_header(response, 'Cookie')):
+        return None
+    if 'private' in response.get('Cache-Control', ()):
+        return None
+    max_age = get_max_age(response)
+    return timeout if max_age is None else max_age or None
+
+
+def cache_page_safe(request, view, timeout, key_prefix):
+    """cache_page на get_or_compute: ключ учитывает Vary, как в Django."""
+    rendered = []
+
+    def compute():
+        response = view()
+        rendered.append(response)
+        page_timeout = _cacheable_timeout(request, response, timeout)
+        if page_timeout is None:
+            return None
+        # Срок действует только для записи в кэше сервера: браузер каждый
+        # раз сверяет страницу по ETag и не показывает устаревшую ленту.
+        patch_cache_control(response, private=True, max_age=0)
+        return response
+
+    key = get_cache_key(request, key_prefix, 'GET', cache)
+    if key is not None:
+        response = get_or_compute(key, compute, timeout)
+        return rendered[0] if rendered else response
+    # Заголовки Vary страницы ещё неизвестны: первый запрос к адресу.
+    started = time.time()
+    with primary_reads():
+        response = compute()
+    if response is not None:
+        _store(
+            learn_cache_key(request, rendered[0], timeout, key_prefix, cache),
+            rendered[0], timeout, started
+        )
+    return rendered[0]
+
+
+def _formatted(scopes, request, kwargs):
+    return (scope.format(user=request.user, **kwargs) for scope in scopes)
+
+
+def versioned_cache_page(timeout, key_prefix, *scopes):
+    """cache_page, чей ключ включает версии областей.
+
+    Области — шаблоны строк, подставляются аргументы представления
+    и текущий пользователь: versioned_cache_page(60, 'group_page',
+    'group:{slug}') или 'feed:{user.pk}'. Страница для кэша собирается
+    из основной базы, а не из реплики, которая может отставать от
+    записи со сброшенной версией; запрос, закреплённый за основной
+    базой, кэш минует. Пересчёт страницы защищён от лавины запросов,
+    см. get_or_compute.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # Страницу для анонимов уже кэширует AnonymousPageCacheMiddleware.
+            if (pinned() or request.method not in ('GET', 'HEAD')
+                    or getattr(request, '_anonymous_page', False)):
+                return view(request, *args, **kwargs)
+            version = page_version(*_formatted(scopes, request, kwargs))
+            return cache_page_safe(
+                request, lambda: view(request, *args, **kwargs), timeout,
+                f'{key_prefix}.{version}'
+            )
+        return wrapper
+    return decorator
+
+
+def anonymous_page(timeout, *scopes, personal=False):
+    """Отмечает страницу для AnonymousPageCacheMiddleware.
+
+    Области — как у versioned_cache_page. personal=True значит, что от
+    пользователя на странице зависят только блоки {% personal %}: тогда
+    вошедшему отдаётся готовая страница с перерисованными блоками.
+    """
+    def decorator(view):
+        view.anonymous_page = (timeout, scopes, personal)
+        return view
+    return decorator
+
+
+def anonymous_page_key(request, match):
+    """(ключ, срок, personal) страницы или None, если она не кэшируется."""
+    spec = getattr(match.func, 'anonymous_page', None)
+    if spec is None or request.method not in ('GET', 'HEAD'):
+        return None
+    timeout, scopes, personal = spec
+    version = page_version(
+        *(scope.format(**match.kwargs) for scope in scopes)
+    )
+    path = md5(request.get_full_path().encode()).hexdigest()
+    return (
+        f'anonymous_page:{match.view_name}.{version}:{path}', timeout,
+        personal
+    )
+
+
+def versioned_etag(*scopes, extra=None):
+    """condition() с ETag из версий областей и текущего пользователя.
+
+    Версии читаются из кэша без запросов к базе, поэтому неизменившаяся
+    страница отвечает 304 раньше кэша страниц и шаблонов. extra(request,
+    **kwargs) добавляет к ETag то, что версии не отслеживают.
+    """
+    def etag(request, *args, **kwargs):
+        parts = [
+            page_version(*_formatted(scopes, request, kwargs)),
+            request.user.pk,
+        ]
+        if extra:
+            parts.append(extra(request, *args, **kwargs))
+        return md5(repr(parts).encode()).hexdigest()
+    return condition(etag_func=etag)
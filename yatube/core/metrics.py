@@ -0,0 +1,146 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+# Границы корзин гистограмм: секунды для времени, штуки для запросов.
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Счётчики одного запроса, которые копят обёртки БД, шаблонов и кэша."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Вложенные render_to_string (например, карточки постов внутри
+        # страницы) и get внутри get_many не учитываются повторно.
+        self.template_depth = 0
+        self.cache_depth = 0
+
+
+def start():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def stop():
+    _local.stats = None
+
+
+def current():
+    """Счётчики текущего запроса или None вне запроса."""
+    return getattr(_local, 'stats', None)
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = defaultdict(lambda: [[0] * (len(buckets) + 1), 0, 0])
+
+    def observe(self, label, value):
+        with self.lock:
+            counts, _, _ = series = self.series[label]
+            counts[bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self.lock:
+            series = {
+                label: (list(counts), total, count)
+                for label, (counts, total, count) in self.series.items()
+            }
+        lines = [f'# HELP {self.name} {self.help}',
+                 f'# TYPE {self.name} histogram']
+        for label, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                lines.append(
+                    f'{self.name}_bucket{{view="{label}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, label='view'):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.lock = threading.Lock()
+        self.series = defaultdict(int)
+
+    def inc(self, label, value=1):
+        with self.lock:
+            self.series[label] += value
+
+    def render(self):
+        with self.lock:
+            series = dict(self.series)
+        return [f'# HELP {self.name} {self.help}',
+                f'# TYPE {self.name} counter'] + [
+            f'{self.name}{{{self.label}="{label}"}} {value}'
+            for label, value in sorted(series.items())
+        ]
+
+
+REQUEST_TIME = Histogram(
+    'yatube_request_duration_seconds', 'Полное время запроса.', TIME_BUCKETS
+)
+SQL_TIME = Histogram(
+    'yatube_sql_duration_seconds', 'Время SQL-запросов за запрос.',
+    TIME_BUCKETS
+)
+SQL_QUERIES = Histogram(
+    'yatube_sql_queries', 'Число SQL-запросов за запрос.', COUNT_BUCKETS
+)
+TEMPLATE_TIME = Histogram(
+    'yatube_template_duration_seconds', 'Время отрисовки шаблонов.',
+    TIME_BUCKETS
+)
+CACHE_HITS = Counter('yatube_cache_hits_total', 'Попадания в кэш.')
+CACHE_MISSES = Counter('yatube_cache_misses_total', 'Промахи кэша.')
+LOCAL_CACHE = Counter(
+    'yatube_local_cache_total',
+    'События локального уровня кэша: hit, miss, eviction, invalidation, '
+    'expired.', label='event'
+)
+OBJECT_CACHE_HITS = Counter(
+    'yatube_object_cache_hits_total', 'Попадания в кэш объектов.',
+    label='kind'
+)
+OBJECT_CACHE_MISSES = Counter(
+    'yatube_object_cache_misses_total', 'Промахи кэша объектов.',
+    label='kind'
+)
+METRICS = (REQUEST_TIME, SQL_TIME, SQL_QUERIES, TEMPLATE_TIME, CACHE_HITS,
+           CACHE_MISSES, LOCAL_CACHE, OBJECT_CACHE_HITS, OBJECT_CACHE_MISSES)
+
+
+def observe(view, stats, duration):
+    REQUEST_TIME.observe(view, duration)
+    SQL_TIME.observe(view, stats.sql_time)
+    SQL_QUERIES.observe(view, stats.queries)
+    TEMPLATE_TIME.observe(view, stats.template_time)
+    CACHE_HITS.inc(view, stats.cache_hits)
+    CACHE_MISSES.inc(view, stats.cache_misses)
+
+
+def render():
+    """Все метрики процесса в текстовом формате Prometheus."""
+    return '\n'.join(
+        line for metric in METRICS for line in metric.render()
+    ) + '\n'
@@ -0,0 +1,182 @@
+from contextlib import ExitStack
+from hashlib import md5
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.http import quote_etag
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+
+from . import metrics, profiling, routers
+from .cache import anonymous_page_key, get_or_compute, peek
+from .personal import fill
+from .slow_queries import SlowQueryLog
+
+
+def _timed_execute(execute, sql, params, many, context):
+    stats = metrics.current()
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_time += perf_counter() - started
+
+
+class ServerTimingMiddleware:
+    """Замеряет SQL, шаблоны, кэш и полное время каждого запроса.
+
+    Итог уходит клиенту в заголовке Server-Timing и копится в
+    гистограммах по имени представления для /metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.start()
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_timed_execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.stop()
+        duration = perf_counter() - started
+        match = request.resolver_match
+        metrics.observe(
+            match.view_name if match else 'unresolved', stats, duration
+        )
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} SQL"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;desc="hit {stats.cache_hits}, miss {stats.cache_misses}"',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Пишет медленные SQL-запросы с маршрутом, шаблоном и строкой кода."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = SlowQueryLog(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            return self.get_response(request)
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос сотрудника с ?_profile или заголовком X-Profile.
+
+    Без флага запрос проходит дальше после двух проверок словарей.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling.requested(request):
+            return profiling.profile(request, self.get_response)
+        return self.get_response(request)
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет за основной базой запросы сессии, которая только что писала.
+
+    Небезопасные методы читают из основной базы целиком. Если запрос
+    что-то записал, клиент получает куку на REPLICA_PIN_SECONDS, пока
+    реплики догоняют основную базу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                or settings.REPLICA_PIN_COOKIE in request.COOKIES):
+            routers.pin()
+        else:
+            routers.unpin()
+        try:
+            response = self.get_response(request)
+            if routers.pinned() and settings.DATABASE_REPLICAS:
+                response.set_cookie(
+                    settings.REPLICA_PIN_COOKIE, '1',
+                    max_age=settings.REPLICA_PIN_SECONDS, httponly=True
+                )
+            return response
+        finally:
+            routers.unpin()
+
+
+class AnonymousPageCacheMiddleware:
+    """Готовые страницы для посетителей без сессии, см. anonymous_page.
+
+    Аноним без куки сессии получает страницу из кэша, не трогая сессию
+    и пользователя; общие кэши могут хранить её ANONYMOUS_PAGE_MAX_AGE.
+    Вошедший на странице с personal=True получает ту же страницу с
+    перерисованными для него блоками, на остальных — свежую отрисовку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            page = anonymous_page_key(request, resolve(request.path_info))
+        except Resolver404:
+            page = None
+        if page is None or settings.REPLICA_PIN_COOKIE in request.COOKIES:
+            return self.get_response(request)
+        key, timeout, personal = page
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            response = peek(key) if personal else None
+            if response is None:
+                return self.get_response(request)
+            etag = quote_etag(md5(
+                f'{response.get("ETag")}:{request.user.pk}'.encode()
+            ).hexdigest())
+            response = get_conditional_response(
+                request, etag=etag, response=response
+            )
+            if response.status_code == 200:
+                response.content = fill(
+                    response.content.decode(response.charset), request
+                )
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, max_age=0)
+            return response
+        request._anonymous_page = True
+        rendered = []
+
+        def render():
+            response = self.get_response(request)
+            rendered.append(response)
+            # Ошибки и ответы, ставящие куки, не кэшируются.
+            if (response.status_code != 200 or response.streaming
+                    or response.cookies):
+                return None
+            patch_cache_control(
+                response, public=True,
+                max_age=settings.ANONYMOUS_PAGE_MAX_AGE
+            )
+            patch_vary_headers(response, ['Cookie'])
+            return response
+
+        response = get_or_compute(key, render, timeout)
+        if response is None:
+            return rendered[0]
+        return get_conditional_response(
+            request, etag=response.get('ETag'), response=response
+        )
@@ -0,0 +1,24 @@
+import json
+import re
+
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+BLOCK = '<!--personal {}-->{}<!--/personal-->'
+BLOCK_RE = re.compile(r'<!--personal (\[.*?\])-->.*?<!--/personal-->', re.S)
+
+
+def render_block(template_name, context, request):
+    """Блок, зависящий только от пользователя, в метках для подстановки."""
+    return mark_safe(BLOCK.format(
+        json.dumps([template_name, context]),
+        render_to_string(template_name, context, request=request)
+    ))
+
+
+def fill(content, request):
+    """Перерисовывает блоки закэшированной страницы для пользователя."""
+    return BLOCK_RE.sub(
+        lambda match: render_block(*json.loads(match.group(1)), request),
+        content
+    )
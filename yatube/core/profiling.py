@@ -0,0 +1,49 @@
+import cProfile
+import os
+import pstats
+from datetime import datetime
+
+from django.conf import settings
+from django.utils.text import slugify
+
+SUFFIX = '.pstats'
+QUERY_FLAG = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+
+
+def requested(request):
+    """Флаг профилирования; пользователь проверяется только при флаге."""
+    return ((QUERY_FLAG in request.GET or HEADER in request.META)
+            and request.user.is_staff)
+
+
+def profile(request, get_response):
+    """Выполняет запрос под cProfile и сохраняет .pstats в PROFILE_DIR."""
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+    name = '{:%Y%m%d-%H%M%S-%f}-{}-{}{}'.format(
+        datetime.now(), request.method.lower(),
+        slugify(request.path) or 'root', SUFFIX
+    )
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(settings.PROFILE_DIR, name))
+    for old in recent()[settings.PROFILE_KEEP:]:
+        os.remove(os.path.join(settings.PROFILE_DIR, old))
+    response['X-Profile-Id'] = name
+    return response
+
+
+def recent():
+    """Имена сохранённых профилей, новые первыми."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    return sorted(
+        (name for name in os.listdir(settings.PROFILE_DIR)
+         if name.endswith(SUFFIX)),
+        reverse=True
+    )
+
+
+def summary(name):
+    stats = pstats.Stats(os.path.join(settings.PROFILE_DIR, name))
+    return {'name': name, 'calls': stats.total_calls, 'time': stats.total_tt}
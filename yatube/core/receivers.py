@@ -0,0 +1,24 @@
+from time import monotonic
+
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import sqlite
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    connection.optimized_at = monotonic()
+    with connection.cursor() as cursor:
+        sqlite.configure(cursor)
+
+
+@receiver(request_finished)
+def optimize_sqlite(sender, **kwargs):
+    for connection in connections.all():
+        if connection.vendor == 'sqlite' and connection.connection:
+            sqlite.optimize(connection)
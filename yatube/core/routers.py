@@ -0,0 +1,66 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Приложения, чтение которых не терпит отставания реплик.
+PRIMARY_APPS = {'sessions'}
+
+_local = threading.local()
+
+
+def pin():
+    """Направляет чтения текущего потока в основную базу."""
+    _local.pinned = True
+
+
+def unpin():
+    _local.pinned = False
+
+
+def pinned():
+    return getattr(_local, 'pinned', False)
+
+
+@contextmanager
+def primary_reads():
+    """Чтения внутри блока идут в основную базу.
+
+    Так читает всё, что собирается в кэш под версией тегов: реплика,
+    отставшая от записи со сброшенной версией, сохранила бы под новым
+    ключом старое содержимое до конца срока кэша. Поток при этом не
+    закрепляется за основной базой, в отличие от pin.
+    """
+    _local.primary_reads = getattr(_local, 'primary_reads', 0) + 1
+    try:
+        yield
+    finally:
+        _local.primary_reads -= 1
+
+
+class PrimaryReplicaRouter:
+    """Запись в основную базу, чтение из случайной реплики DATABASE_REPLICAS.
+
+    Чтение остаётся в основной базе, если поток уже писал (см. pin),
+    наполняет кэш (см. primary_reads), если открыта транзакция или если
+    реплик нет. Первая запись потока
+    закрепляет его за основной базой, чтобы запрос видел свои изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (not settings.DATABASE_REPLICAS or pinned()
+                or getattr(_local, 'primary_reads', 0)
+                or model._meta.app_label in PRIMARY_APPS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, объекты из них можно связывать.
+        return True
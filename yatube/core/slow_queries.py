@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import queue
+import re
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from time import perf_counter
+
+from django.conf import settings
+from django.template.base import Node
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r'\s+')
+# Кадры самих обёрток не указывают на источник запроса.
+_INSTRUMENTATION = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ('middleware.py', 'slow_queries.py', 'backends.py')
+}
+
+
+def normalize(sql):
+    """SQL без значений: одинаковые запросы склеиваются в один шаблон."""
+    sql = _LITERALS.sub('%s', sql)
+    return _SPACES.sub(' ', _IN_LIST.sub('IN (...)', sql)).strip()
+
+
+def _origin():
+    """Строка шаблона и кадр кода проекта, из которых пришёл запрос."""
+    template = code = None
+    frame = sys._getframe(2)
+    while frame and not (template and code):
+        node = frame.f_locals.get('self')
+        # type() вместо isinstance: ленивый объект (например,
+        # request.user) не должен вычисляться и порождать запрос.
+        if (template is None and issubclass(type(node), Node)
+                and getattr(node, 'token', None)):
+            origin = node.origin
+            template = (f'{origin.template_name or origin.name}:'
+                        f'{node.token.lineno}')
+        filename = frame.f_code.co_filename
+        if (code is None and filename.startswith(settings.BASE_DIR)
+                and filename not in _INSTRUMENTATION):
+            code = (f'{os.path.relpath(filename, settings.BASE_DIR)}:'
+                    f'{frame.f_lineno}')
+        frame = frame.f_back
+    return template, code
+
+
+class SlowQueryLog:
+    """execute_wrapper, который пишет запросы дольше SLOW_QUERY_MS.
+
+    Стек разбирается только для медленных запросов, поэтому обычный
+    запрос стоит одного замера времени.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (perf_counter() - started) * 1000
+            if duration >= settings.SLOW_QUERY_MS:
+                self.log(sql, duration)
+
+    def log(self, sql, duration):
+        template, code = _origin()
+        match = self.request.resolver_match
+        logger.warning(json.dumps({
+            'sql': normalize(sql),
+            'ms': round(duration, 2),
+            'url_name': match.view_name if match else None,
+            'path': self.request.path,
+            'template': template,
+            'code': code,
+        }, ensure_ascii=False))
+
+
+class _RotatingFileHandler(RotatingFileHandler):
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class BufferedRotatingFileHandler(QueueHandler):
+    """Ротируемый файл, который пишет отдельный поток.
+
+    Поток запроса только кладёт запись в очередь и не ждёт диска.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8'):
+        super().__init__(queue.Queue(-1))
+        self.target = _RotatingFileHandler(
+            filename, maxBytes=maxBytes, backupCount=backupCount,
+            encoding=encoding, delay=True
+        )
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def close(self):
+        # logging.shutdown при выходе закрывает обработчики: поток
+        # успевает дописать очередь.
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+        super().close()
+
+    def prepare(self, record):
+        # Форматирование остаётся потоку записи.
+        return record
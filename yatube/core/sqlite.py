@@ -0,0 +1,27 @@
+from time import monotonic
+
+from django.conf import settings
+
+
+def configure(cursor):
+    """Выставляет прагмы SQLITE_PRAGMAS на новом соединении.
+
+    journal_mode=wal сохраняется в файле базы, остальные прагмы
+    действуют только на время соединения.
+    """
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def optimize(connection):
+    """PRAGMA optimize не чаще SQLITE_OPTIMIZE_INTERVAL секунд.
+
+    Соединения живут CONN_MAX_AGE и переживают много запросов, поэтому
+    статистика планировщика обновляется по времени, а не при закрытии.
+    """
+    now = monotonic()
+    if now - connection.optimized_at < settings.SQLITE_OPTIMIZE_INTERVAL:
+        return
+    connection.optimized_at = now
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA optimize')
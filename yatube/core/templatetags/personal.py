@@ -0,0 +1,15 @@
+from django import template
+
+from core.personal import render_block
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal(context, template_name, **kwargs):
+    """include блока пользователя, который можно заменить в кэше страниц.
+
+    Контекст блока — запрос и переданные литералы, поэтому блок
+    одинаково рисуется в странице и при подстановке в готовую страницу.
+    """
+    return render_block(template_name, kwargs, context.get('request'))
@@ -0,0 +1,425 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+# Журнал изменений общего кэша хранит столько последних записей; процесс,
+# отставший сильнее, очищает свой локальный уровень целиком.
+CHANGES_KEEP = 10000
+# Раз в столько записей чистится журнал и просроченные ключи.
+CULL_EVERY = 500
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE TABLE IF NOT EXISTS changes ('
+    'seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT)',
+)
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, общий для процессов одного хоста.
+
+    Каждая запись, удаление и очистка пишутся в журнал changes, по
+    которому процессы узнают, какие локальные копии устарели.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение своё у потока и не переживает fork воркера.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(self.location), exist_ok=True)
+            db = sqlite3.connect(
+                self.location, timeout=5, isolation_level=None
+            )
+            db.execute('PRAGMA journal_mode = wal')
+            db.execute('PRAGMA synchronous = off')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db, self._local.pid = db, os.getpid()
+        return self._local.db
+
+    def _write(self, func):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            result = func(db)
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return result
+
+    def _log(self, db, key):
+        seq = db.execute(
+            'INSERT INTO changes (key) VALUES (?)', [key]
+        ).lastrowid
+        if not seq % CULL_EVERY:
+            db.execute(
+                'DELETE FROM changes WHERE seq <= ?', [seq - CHANGES_KEEP]
+            )
+            self._cull(db)
+        return seq
+
+    def _cull(self, db):
+        db.execute('DELETE FROM cache WHERE expires <= ?', [time.time()])
+        count = db.execute('SELECT count(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                [count // self._cull_frequency]
+            )
+
+    def _expires(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else time.time() + timeout
+
+    def changes(self, since):
+        """Последний номер журнала и ключи, изменённые после since.
+
+        Вместо ключей — None, если журнал уже обрезан или кэш очищали.
+        """
+        rows = self._db.execute(
+            'SELECT seq, key FROM changes WHERE seq > ? ORDER BY seq',
+            [since]
+        ).fetchall()
+        if not rows:
+            return since, []
+        if rows[0][0] != since + 1 or any(key is None for _, key in rows):
+            return rows[-1][0], None
+        return rows[-1][0], rows
+
+    def last_change(self):
+        return self._db.execute(
+            'SELECT coalesce(max(seq), 0) FROM changes'
+        ).fetchone()[0]
+
+    def get_raw(self, keys):
+        """{ключ: (pickle, срок)} для готовых ключей без просроченных."""
+        keys = list(keys)
+        rows = self._db.execute(
+            'SELECT key, value, expires FROM cache WHERE key IN '
+            f'({", ".join("?" * len(keys))}) '
+            'AND (expires IS NULL OR expires > ?)', keys + [time.time()]
+        ).fetchall()
+        return {key: (value, expires) for key, value, expires in rows}
+
+    def set_raw(self, items, timeout=DEFAULT_TIMEOUT):
+        """Записывает {ключ: pickle} и возвращает номер журнала и срок."""
+        expires = self._expires(timeout)
+
+        def write(db):
+            seq = None
+            for key, value in items.items():
+                db.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires) '
+                    'VALUES (?, ?, ?)', [key, value, expires]
+                )
+                seq = self._log(db, key)
+            return seq
+        return self._write(write), expires
+
+    def add_raw(self, key, value, timeout=DEFAULT_TIMEOUT):
+        expires = self._expires(timeout)
+
+        def write(db):
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                [key, time.time()]
+            )
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)', [key, value, expires]
+            ).rowcount
+            if added:
+                self._log(db, key)
+            return bool(added)
+        return self._write(write)
+
+    def touch_raw(self, key, timeout=DEFAULT_TIMEOUT):
+        expires = self._expires(timeout)
+
+        def write(db):
+            touched = db.execute(
+                'UPDATE cache SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                [expires, key, time.time()]
+            ).rowcount
+            if touched:
+                self._log(db, key)
+            return bool(touched)
+        return self._write(write)
+
+    def incr_raw(self, key, delta):
+        """Атомарно между процессами: чтение и запись в одной транзакции."""
+        def write(db):
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)', [key, time.time()]
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                [pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key]
+            )
+            self._log(db, key)
+            return value
+        return self._write(write)
+
+    def delete_raw(self, keys):
+        def write(db):
+            for key in keys:
+                db.execute('DELETE FROM cache WHERE key = ?', [key])
+                self._log(db, key)
+        self._write(write)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.add_raw(
+            self._key(key, version),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL), timeout
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        found = self.get_raw([key])
+        return pickle.loads(found[key][0]) if key in found else default
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        return {
+            keys[key]: pickle.loads(value)
+            for key, (value, _) in self.get_raw(keys).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self.set_raw({
+                self._key(key, version): pickle.dumps(
+                    value, pickle.HIGHEST_PROTOCOL
+                ) for key, value in data.items()
+            }, timeout)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.touch_raw(self._key(key, version), timeout)
+
+    def incr(self, key, delta=1, version=None):
+        return self.incr_raw(self._key(key, version), delta)
+
+    def delete(self, key, version=None):
+        self.delete_raw([self._key(key, version)])
+
+    def delete_many(self, keys, version=None):
+        self.delete_raw([self._key(key, version) for key in keys])
+
+    def has_key(self, key, version=None):
+        return bool(self.get_raw([self._key(key, version)]))
+
+    def clear(self):
+        def write(db):
+            db.execute('DELETE FROM cache')
+            self._log(db, None)
+        self._write(write)
+
+
+class LocalTier:
+    """Ограниченный LRU процесса: pickle значения, срок и номер журнала."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.synced = float('-inf')
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.time():
+                del self.items[key]
+                metrics.LOCAL_CACHE.inc('expired')
+                return None
+            self.items.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value, expires, seq):
+        expires = min(expires or float('inf'), time.time() + self.timeout)
+        with self.lock:
+            self.items[key] = (value, expires, seq)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_entries:
+                self.items.popitem(last=False)
+                metrics.LOCAL_CACHE.inc('eviction')
+
+    def pop(self, keys):
+        with self.lock:
+            for key in keys:
+                self.items.pop(key, None)
+
+    def apply(self, seq, changes):
+        """Убирает ключи, изменённые в общем кэше другими записями."""
+        with self.lock:
+            if changes is None:
+                metrics.LOCAL_CACHE.inc('invalidation', len(self.items))
+                self.items.clear()
+            for change, key in changes or ():
+                item = self.items.get(key)
+                # Собственная запись процесса уже лежит в локальном уровне.
+                if item is not None and item[2] != change:
+                    del self.items[key]
+                    metrics.LOCAL_CACHE.inc('invalidation')
+            self.seq = seq
+
+
+# Локальный уровень общий для потоков процесса, как у LocMemCache.
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    """LRU в памяти процесса перед общим кэшем SQLiteCache.
+
+    Не чаще раза в SYNC_INTERVAL секунд чтение просматривает журнал
+    общего кэша и выбрасывает локальные копии ключей, которые поменяли
+    другие процессы. Между просмотрами локальное попадание не трогает
+    SQLite, поэтому запись другого воркера, например сброс версии
+    страницы, видна здесь не позже чем через SYNC_INTERVAL; свои записи
+    процесс видит сразу. OPTIONS: LOCAL_MAX_ENTRIES и LOCAL_TIMEOUT
+    ограничивают локальный уровень, MAX_ENTRIES и CULL_FREQUENCY — общий.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared = SQLiteCache(location, params)
+        self.sync_interval = float(options.get('SYNC_INTERVAL', 1))
+        with _tiers_lock:
+            if location not in _tiers:
+                _tiers[location] = LocalTier(
+                    int(options.get('LOCAL_MAX_ENTRIES', 1000)),
+                    int(options.get('LOCAL_TIMEOUT', 60)),
+                )
+                _tiers[location].seq = self.shared.last_change()
+                _tiers[location].synced = time.monotonic()
+            self.tier = _tiers[location]
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self.tier.synced < self.sync_interval:
+            return
+        self.tier.synced = now
+        self.tier.apply(*self.shared.changes(self.tier.seq))
+
+    def _get_raw(self, keys):
+        self._sync()
+        found = {}
+        for key in keys:
+            value = self.tier.get(key)
+            if value is not None:
+                found[key] = value
+        metrics.LOCAL_CACHE.inc('hit', len(found))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            metrics.LOCAL_CACHE.inc('miss', len(missing))
+            seq = self.tier.seq
+            for key, (value, expires) in self.shared.get_raw(missing).items():
+                self.tier.set(key, value, expires, seq)
+                found[key] = value
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        found = self._get_raw([key])
+        return pickle.loads(found[key]) if key in found else default
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        return {
+            keys[key]: pickle.loads(value)
+            for key, value in self._get_raw(list(keys)).items()
+        }
+
+    def has_key(self, key, version=None):
+        return bool(self._get_raw([self._key(key, version)]))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        items = {
+            self._key(key, version): pickle.dumps(
+                value, pickle.HIGHEST_PROTOCOL
+            ) for key, value in data.items()
+        }
+        seq, expires = self.shared.set_raw(items, timeout)
+        # Пачка пишется одной транзакцией: номера журнала идут подряд.
+        for number, (key, value) in enumerate(items.items()):
+            self.tier.set(
+                key, value, expires, seq - len(items) + number + 1
+            )
+        return []
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self.tier.pop([key])
+        return self.shared.add_raw(
+            key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), timeout
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self.tier.pop([key])
+        return self.shared.touch_raw(key, timeout)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        self.tier.pop([key])
+        return self.shared.incr_raw(key, delta)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        self.tier.pop(keys)
+        self.shared.delete_raw(keys)
+
+    def clear(self):
+        self.shared.clear()
+        self.tier.apply(self.shared.last_change(), None)
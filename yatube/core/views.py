@@ -1,5 +1,12 @@
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics, profiling
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +18,30 @@ def csrf_failure(request, reason=''):
 
 def server_error(request, reason=''):
     return render(request, 'core/500.html')
+
+
+def metrics_view(request):
+    if (request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS
+            and not request.user.is_staff):
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
+
+
+@staff_member_required
+def profiles(request):
+    return render(request, 'core/profiles.html', {
+        'profiles': [profiling.summary(name) for name in profiling.recent()],
+        'flag': profiling.QUERY_FLAG,
+    })
+
+
+@staff_member_required
+def profile_download(request, name):
+    if name not in profiling.recent():
+        raise Http404
+    return FileResponse(
+        open(os.path.join(settings.PROFILE_DIR, name), 'rb'),
+        as_attachment=True
+    )
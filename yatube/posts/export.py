@@ -0,0 +1,91 @@
+import csv
+import json
+import zlib
+
+from django.core.files.storage import default_storage
+
+from .models import Comment, Post
+from .settings import EXPORT_BUFFER_SIZE, EXPORT_CHUNK_SIZE
+
+FIELDS = ('type', 'id', 'author', 'post', 'group', 'text', 'pub_date',
+          'created', 'image', 'image_url')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def records(author):
+    """Посты и комментарии автора; запросы читаются через iterator().
+
+    Записи JSONL совместимы с import_yatube.
+    """
+    for pk, text, pub_date, group, image in Post.objects.filter(
+        author=author
+    ).order_by('pk').values_list(
+        'pk', 'text', 'pub_date', 'group__slug', 'image'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'post', 'id': pk, 'author': author.username,
+            'group': group, 'text': text, 'pub_date': pub_date.isoformat(),
+            'image': image, 'image_url': image and default_storage.url(image),
+        }
+    for pk, post, text, created in Comment.objects.filter(
+        author=author
+    ).order_by('pk').values_list(
+        'pk', 'post_id', 'text', 'created'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'comment', 'id': pk, 'author': author.username,
+            'post': post, 'text': text, 'created': created.isoformat(),
+        }
+
+
+def _jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _csv(rows):
+    writer = csv.DictWriter(_Echo(), FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+FORMATS = {'jsonl': _jsonl, 'csv': _csv}
+
+
+def _buffered(lines):
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(author, output_format='jsonl', compress=False):
+    """Выгрузка автора кусками байтов, память не растёт с числом постов."""
+    chunks = _buffered(FORMATS[output_format](records(author)))
+    return _gzipped(chunks) if compress else chunks
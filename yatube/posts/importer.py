@@ -0,0 +1,307 @@
+import csv
+import gzip
+import io
+import json
+from itertools import groupby, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Case, Max, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache import bump
+
+from . import stats, timeline
+from .models import Comment, Follow, Group, Post, User
+from .settings import IMPORT_BATCH_SIZE
+
+KINDS = ('group', 'post', 'comment', 'follow')
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return io.open(path, encoding='utf-8', newline='')
+
+
+def read_records(path, kind=None):
+    """Построчно читает JSONL или CSV, не загружая файл в память.
+
+    В JSONL тип записи берётся из поля type, в CSV все строки одного
+    типа kind, а поля задаются заголовком.
+    """
+    with _open(path) as source:
+        if '.csv' in path:
+            for row in csv.DictReader(source):
+                yield dict(row, type=kind)
+            return
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                record.setdefault('type', kind)
+                yield record
+
+
+def _date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def _bulk_create_dated(model, objs, *names):
+    """bulk_create, сохраняющий даты из архива вместо текущего времени.
+
+    auto_now и auto_now_add подменяют даты при вставке, поэтому они
+    возвращаются следующим UPDATE по заранее назначенным первичным
+    ключам. Поля модели не меняются, и параллельные сохранения в том же
+    процессе получают свои даты как обычно.
+    """
+    dates = {obj.pk: [getattr(obj, name) for name in names] for obj in objs}
+    model.objects.bulk_create(objs)
+    if not dates:
+        return
+    fields = [model._meta.get_field(name) for name in names]
+    model.objects.filter(pk__in=dates).update(**{
+        field.name: Case(*[
+            When(pk=pk, then=Value(values[index], output_field=field))
+            for pk, values in dates.items()
+        ], output_field=field) for index, field in enumerate(fields)
+    })
+    for obj in objs:
+        for name, value in zip(names, dates[obj.pk]):
+            setattr(obj, name, value)
+
+
+def _duplicates(model, names, keys):
+    """Естественные ключи из keys, строки с которыми уже записаны.
+
+    Так повторный импорт не размножает записи архива без id.
+    """
+    keys = set(keys)
+    if not keys:
+        return set()
+    return keys & set(model.objects.filter(**{
+        f'{name}__in': {key[index] for key in keys}
+        for index, name in enumerate(names)
+    }).values_list(*names))
+
+
+def _existing(model, ids):
+    return set(model.objects.filter(
+        pk__in=[pk for pk in ids if pk]
+    ).values_list('pk', flat=True))
+
+
+def _fresh(model, objs, names):
+    """Объекты, которых ещё нет в таблице.
+
+    Записи с id сверяются по первичному ключу, записи без id — по
+    естественному ключу из полей names.
+    """
+    def natural(obj):
+        return tuple(getattr(obj, name) for name in names)
+
+    ids = _existing(model, (obj.pk for obj in objs))
+    keys = _duplicates(
+        model, names, (natural(obj) for obj in objs if not obj.pk)
+    )
+    fresh = []
+    for obj in objs:
+        if obj.pk:
+            if obj.pk in ids:
+                continue
+            ids.add(obj.pk)
+        elif natural(obj) in keys:
+            continue
+        else:
+            keys.add(natural(obj))
+        fresh.append(obj)
+    return fresh
+
+
+class Importer:
+    """Пакетная загрузка архива: группы, посты, комментарии, подписки.
+
+    Авторы и группы ищутся через словари в памяти, недостающие
+    пользователи создаются без пароля. Каждая пачка пишется одним
+    bulk_create в своей транзакции. Уже записанные посты и комментарии
+    пропускаются: с id — по id, без id — по автору, дате и тексту,
+    поэтому прерванный импорт можно запустить снова.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.users = {}
+        self.groups = {}
+        # Что затронули комментарии и подписки: они пишутся без сигналов.
+        self.changed_posts = set()
+        self.changed_users = set()
+        self.changed_feeds = set()
+        self.next_post_id, self.next_comment_id = (
+            (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in (Post, Comment)
+        )
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - set(self.users) - {None, ''}
+        if missing:
+            User.objects.bulk_create([
+                User(username=username, password=make_password(None))
+                for username in missing
+            ], ignore_conflicts=True)
+            self.users.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk'))
+        return self.users
+
+    def resolve_groups(self, slugs):
+        missing = set(slugs) - set(self.groups) - {None, ''}
+        if missing:
+            self.groups.update(Group.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'pk'))
+        return self.groups
+
+    def run(self, records):
+        """Выдаёт (тип, записано, пропущено) после каждой пачки."""
+        for kind, group in groupby(records, key=lambda item: item['type']):
+            if kind not in KINDS:
+                raise ValueError(f'Неизвестный тип записи: {kind}')
+            write = getattr(self, f'write_{kind}s')
+            batch = list(islice(group, self.batch_size))
+            while batch:
+                with transaction.atomic():
+                    written = write(batch)
+                yield kind, written, len(batch) - written
+                batch = list(islice(group, self.batch_size))
+        self.finish()
+
+    def finish(self):
+        # Комментарии и подписки пишутся без сигналов, поэтому
+        # кэшированные страницы сбрасываются один раз в конце.
+        usernames = {pk: username for username, pk in self.users.items()}
+        bump(
+            'posts', 'groups',
+            *(f'post:{pk}' for pk in self.changed_posts),
+            *(f'profile:{usernames[pk]}' for pk in self.changed_users),
+            *(f'feed:{pk}' for pk in self.changed_feeds)
+        )
+        # Строки с явным id не двигают последовательности PostgreSQL.
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def write_groups(self, records):
+        known = self.resolve_groups(record.get('slug') for record in records)
+        groups = {
+            record['slug']: Group(
+                slug=record['slug'],
+                title=record['title'],
+                description=record.get('description', '')
+            ) for record in records
+            if record.get('slug') and record['slug'] not in known
+        }
+        Group.objects.bulk_create(groups.values(), ignore_conflicts=True)
+        ids = self.resolve_groups(groups)
+        stats.reconcile_groups(ids[slug] for slug in groups)
+        return len(groups)
+
+    def _assign_ids(self, objs, attr):
+        """Назначает id записям без него, не занимая id из архива."""
+        explicit = [obj.pk for obj in objs if obj.pk]
+        if explicit:
+            setattr(self, attr, max(getattr(self, attr), max(explicit) + 1))
+        for obj in objs:
+            if not obj.pk:
+                obj.pk = getattr(self, attr)
+                setattr(self, attr, obj.pk + 1)
+        return objs
+
+    def write_posts(self, records):
+        users = self.resolve_users(record.get('author') for record in records)
+        groups = self.resolve_groups(record.get('group') for record in records)
+        posts = []
+        for record in records:
+            group = record.get('group')
+            if (record.get('author') not in users
+                    or group and group not in groups):
+                continue
+            image = record.get('image') or ''
+            pub_date = _date(record.get('pub_date'))
+            posts.append(Post(
+                pk=int(record.get('id') or 0) or None,
+                author_id=users[record['author']],
+                group_id=groups.get(group),
+                text=record['text'],
+                image=image,
+                thumbnail_ready=not image,
+                pub_date=pub_date,
+                modified=pub_date,
+            ))
+        posts = self._assign_ids(
+            _fresh(Post, posts, ('author_id', 'pub_date', 'text')),
+            'next_post_id'
+        )
+        _bulk_create_dated(Post, posts, 'pub_date', 'modified')
+        # Раскладка по лентам прошла при вставке, ещё с текущей датой.
+        timeline.redate([post.pk for post in posts])
+        return len(posts)
+
+    def write_comments(self, records):
+        users = self.resolve_users(record.get('author') for record in records)
+        posts = _existing(Post, (record.get('post') for record in records))
+        comments = self._assign_ids(_fresh(Comment, [
+            Comment(
+                pk=int(record.get('id') or 0) or None,
+                post_id=int(record['post']),
+                author_id=users[record['author']],
+                text=record['text'],
+                created=_date(record.get('created')),
+            ) for record in records
+            if int(record.get('post') or 0) in posts
+            and record.get('author') in users
+        ], ('post_id', 'author_id', 'created', 'text')), 'next_comment_id')
+        _bulk_create_dated(Comment, comments, 'created')
+        authors = {comment.author_id for comment in comments}
+        stats.reconcile_users(authors)
+        self.changed_posts.update(comment.post_id for comment in comments)
+        self.changed_users.update(authors)
+        return len(comments)
+
+    def write_follows(self, records):
+        users = self.resolve_users(
+            username for record in records
+            for username in (record.get('user'), record.get('author'))
+        )
+        pairs = {
+            (users[record['user']], users[record['author']])
+            for record in records
+            if record.get('user') in users and record.get('author') in users
+        }
+        # Ограничение CheckConstraint: подписка на себя не сохраняется.
+        pairs = {(user, author) for user, author in pairs if user != author}
+        existing = set(Follow.objects.filter(
+            user_id__in={user for user, _ in pairs},
+            author_id__in={author for _, author in pairs},
+        ).values_list('user_id', 'author_id'))
+        pairs -= existing
+        Follow.objects.bulk_create(
+            [Follow(user_id=user, author_id=author)
+             for user, author in pairs],
+            ignore_conflicts=True
+        )
+        if pairs:
+            timeline.follows_created(pairs)
+        users = {pk for pair in pairs for pk in pair}
+        stats.reconcile_users(users)
+        self.changed_users.update(users)
+        self.changed_feeds.update(user for user, _ in pairs)
+        return len(pairs)
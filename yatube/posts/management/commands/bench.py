@@ -0,0 +1,115 @@
+import json
+import os
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post, User
+
+PERCENTILES = (50, 95, 99)
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[round(percent / 100 * (len(values) - 1))]
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет страницы через тестовый клиент Django и пишет в JSON '
+            'задержки p50/p95/p99, пропускную способность и число запросов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='По умолчанию BENCH_DIR/bench.json.'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        reader = User.objects.filter(
+            pk__in=Follow.objects.values('user')
+        ).first()
+        if reader is None or not Post.objects.exists():
+            raise CommandError('Нет данных: сначала запустите seed.')
+        guest, member = Client(), Client()
+        member.force_login(reader)
+        posts = list(Post.objects.values_list('pk', flat=True)[:1000])
+        slugs = list(Group.objects.values_list('slug', flat=True)[:1000])
+        usernames = list(
+            User.objects.values_list('username', flat=True)[:1000]
+        )
+        words = [
+            text.split()[0] for text in Post.objects.exclude(
+                text=''
+            ).values_list('text', flat=True)[:100]
+        ]
+        # Маршрут: клиент и функция, выбирающая аргументы и GET-параметры.
+        routes = {
+            'posts:index': (guest, lambda: (None, {})),
+            'posts:group_list': (guest, lambda: ([rng.choice(slugs)], {})),
+            'posts:profile': (guest, lambda: ([rng.choice(usernames)], {})),
+            'posts:post_detail': (guest, lambda: ([rng.choice(posts)], {})),
+            'posts:post_comments': (
+                guest, lambda: ([rng.choice(posts)], {})
+            ),
+            'posts:search': (guest, lambda: (None, {'q': rng.choice(words)})),
+            'posts:follow_index': (member, lambda: (None, {})),
+        }
+        if not slugs:
+            del routes['posts:group_list']
+        results = {}
+        for name, (client, request) in routes.items():
+            results[name] = self.measure(
+                client, name, request, options['requests'], options['cold']
+            )
+            self.stdout.write(name + ': ' + ', '.join(
+                f'{key} {value:.2f}' for key, value in results[name].items()
+            ))
+        path = options['output']
+        if path is None:
+            os.makedirs(settings.BENCH_DIR, exist_ok=True)
+            path = os.path.join(settings.BENCH_DIR, 'bench.json')
+        with open(path, 'w') as output:
+            json.dump({
+                'date': timezone.now().isoformat(),
+                'requests': options['requests'],
+                'cold': options['cold'],
+                'posts': Post.objects.count(),
+                'routes': results,
+            }, output, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Результаты записаны в {path}.')
+
+    def measure(self, client, name, request, requests, cold):
+        timings, queries = [], 0
+        for _ in range(requests):
+            args, data = request()
+            url = reverse(name, args=args)
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                started = perf_counter()
+                response = client.get(url, data)
+                timings.append((perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: {response.status_code}')
+            queries += len(context)
+        result = {
+            f'p{percent}_ms': _percentile(timings, percent)
+            for percent in PERCENTILES
+        }
+        result['rps'] = len(timings) / (sum(timings) / 1000)
+        result['queries'] = queries / len(timings)
+        return result
@@ -0,0 +1,44 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow, Post, User
+from posts.settings import POSTS_PER_PAGE
+from posts.timeline import feed
+
+
+def _timed(queryset, repeat):
+    started = perf_counter()
+    for _ in range(repeat):
+        list(queryset.all()[:POSTS_PER_PAGE])
+    return (perf_counter() - started) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает чтение первой страницы ленты подписок через JOIN '
+            'по Follow и через материализованную ленту.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            pk__in=Follow.objects.values('user')
+        )[:options['users']]
+        join_total = timeline_total = 0
+        for user in users:
+            join_total += _timed(
+                Post.objects.filter(author__following__user=user),
+                options['repeat']
+            )
+            timeline_total += _timed(feed(user), options['repeat'])
+        count = len(users)
+        if not count:
+            self.stdout.write('Нет пользователей с подписками.')
+            return
+        self.stdout.write(
+            f'join: {join_total / count:.3f} ms/стр., '
+            f'timeline: {timeline_total / count:.3f} ms/стр. '
+            f'({count} польз. x {options["repeat"]} повторов)'
+        )
@@ -0,0 +1,70 @@
+import random
+import sqlite3
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts.search import match_expression
+from posts.settings import POSTS_PER_PAGE
+
+WORDS = 100000
+WORDS_PER_POST = 30
+
+
+def _timed(connection, sql, params, repeat):
+    started = perf_counter()
+    for _ in range(repeat):
+        connection.execute(sql, params).fetchall()
+    return (perf_counter() - started) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает поиск по тексту постов через LIKE и через FTS5 '
+            'на синтетической базе SQLite в памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = [f'слово{number}' for number in range(WORDS)]
+        connection = sqlite3.connect(':memory:')
+        connection.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT)'
+        )
+        connection.execute(
+            'CREATE VIRTUAL TABLE post_fts USING fts5('
+            "text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        connection.executemany('INSERT INTO post (text) VALUES (?)', (
+            (' '.join(rng.choices(vocabulary, k=WORDS_PER_POST)),)
+            for _ in range(options['posts'])
+        ))
+        connection.execute(
+            'INSERT INTO post_fts (rowid, text) SELECT id, text FROM post'
+        )
+        like_total = fts_total = 0
+        queries = rng.sample(vocabulary, options['queries'])
+        for word in queries:
+            like_total += _timed(
+                connection,
+                'SELECT id FROM post WHERE text LIKE ? '
+                'ORDER BY id DESC LIMIT ?',
+                [f'%{word}%', POSTS_PER_PAGE], options['repeat']
+            )
+            fts_total += _timed(
+                connection,
+                'SELECT post.id FROM post_fts JOIN post '
+                'ON post.id = post_fts.rowid WHERE post_fts MATCH ? '
+                'ORDER BY bm25(post_fts) LIMIT ?',
+                [match_expression(word), POSTS_PER_PAGE], options['repeat']
+            )
+        count = len(queries)
+        self.stdout.write(
+            f'like: {like_total / count:.3f} ms/стр., '
+            f'fts5: {fts_total / count:.3f} ms/стр. '
+            f'({options["posts"]} постов, {count} запросов '
+            f'x {options["repeat"]} повторов)'
+        )
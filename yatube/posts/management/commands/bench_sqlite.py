@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from core.sqlite import configure
+from posts.settings import POSTS_PER_PAGE
+
+READ = ('SELECT id, text FROM post WHERE author_id = ? '
+        'ORDER BY id DESC LIMIT ?')
+WRITE = 'INSERT INTO post (author_id, text) VALUES (?, ?)'
+AUTHORS = 1000
+
+
+def _connect(path, tuned):
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    if tuned:
+        configure(connection.cursor())
+    return connection
+
+
+def _worker(path, tuned, persistent, deadline, write, counts, errors):
+    connection = _connect(path, tuned) if persistent else None
+    number = 0
+    while perf_counter() < deadline:
+        current = connection or _connect(path, tuned)
+        number += 1
+        try:
+            if write:
+                current.execute(WRITE, (number % AUTHORS, 'Пост'))
+            else:
+                current.execute(
+                    READ, (number % AUTHORS, POSTS_PER_PAGE)
+                ).fetchall()
+        except sqlite3.OperationalError:
+            errors.append(1)
+            continue
+        finally:
+            if not persistent:
+                current.close()
+        counts.append(1)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает конкурентные чтение и запись во временную базу '
+            'SQLite без настроек и с прагмами SQLITE_PRAGMAS '
+            'и постоянными соединениями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def _run(self, path, tuned, options):
+        reads, writes, errors = [], [], []
+        deadline = perf_counter() + options['seconds']
+        threads = [
+            threading.Thread(target=_worker, args=(
+                path, tuned, tuned, deadline, write, counts, errors
+            ))
+            for write, counts, number in (
+                (False, reads, options['readers']),
+                (True, writes, options['writers']),
+            )
+            for _ in range(number)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = options['seconds']
+        self.stdout.write(
+            f'{"с настройками" if tuned else "по умолчанию"}: '
+            f'чтение {len(reads) / seconds:.0f}/s, '
+            f'запись {len(writes) / seconds:.0f}/s, '
+            f'ошибок блокировки {len(errors)}'
+        )
+
+    def handle(self, *args, **options):
+        for tuned in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                connection = sqlite3.connect(path)
+                connection.execute(
+                    'CREATE TABLE post (id INTEGER PRIMARY KEY, '
+                    'author_id INTEGER, text TEXT)'
+                )
+                connection.execute(
+                    'CREATE INDEX post_author ON post (author_id, id)'
+                )
+                connection.executemany(WRITE, (
+                    (number % AUTHORS, 'Пост')
+                    for number in range(options['posts'])
+                ))
+                connection.commit()
+                connection.close()
+                self._run(path, tuned, options)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import demotable, demote
+
+
+class Command(BaseCommand):
+    help = ('Возвращает в материализованные ленты авторов, у которых '
+            'подписчиков стало меньше FANOUT_FOLLOWERS_LIMIT.')
+
+    def handle(self, *args, **options):
+        authors = demotable()
+        for author_id in authors:
+            demote(author_id)
+        self.stdout.write(f'Авторов возвращено в ленты: {len(authors)}')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты и комментарии пользователя в JSON Lines '
+            'или CSV, при необходимости со сжатием gzip.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', help='По умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        author = User.objects.filter(username=options['username']).first()
+        if author is None:
+            raise CommandError(f'Нет пользователя {options["username"]}.')
+        if options['gzip'] and not options['output']:
+            raise CommandError('Для --gzip нужен --output.')
+        chunks = export(author, options['format'], options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
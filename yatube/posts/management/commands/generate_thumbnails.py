@@ -0,0 +1,63 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.settings import THUMBNAIL_BATCH_SIZE
+from posts.thumbnails import (
+    generate, mark_failed, mark_ready, pending, requeue_lost
+)
+
+
+class Command(BaseCommand):
+    help = ('Готовит миниатюры картинок постов в нескольких процессах. '
+            'С --watch работает как фоновый обработчик новых загрузок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument(
+            '--batch-size', type=int, default=THUMBNAIL_BATCH_SIZE
+        )
+        parser.add_argument('--watch', action='store_true')
+        parser.add_argument('--interval', type=float, default=5)
+        parser.add_argument(
+            '--requeue-lost', action='store_true',
+            help='Сначала вернуть в очередь готовые посты, записи '
+                 'миниатюр которых пропали из хранилища sorl.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_lost']:
+            lost = requeue_lost(options['batch_size'])
+            self.stdout.write(f'Возвращено в очередь: {lost}')
+        total = 0
+        # Упавшие в этом проходе картинки повторяются не сразу, а в
+        # следующем: после паузы --watch или при следующем запуске.
+        failed = set()
+        with ProcessPoolExecutor(options['workers']) as pool:
+            while True:
+                batch = list(pending().exclude(pk__in=failed).order_by(
+                    'pub_date'
+                ).values_list('pk', 'image')[:options['batch_size']])
+                if not batch:
+                    if not options['watch']:
+                        break
+                    failed.clear()
+                    time.sleep(options['interval'])
+                    continue
+                ids, names = zip(*batch)
+                # Процессы пула создаются при первой отправке задач и не
+                # должны унаследовать открытое соединение с базой.
+                connections.close_all()
+                results = list(pool.map(generate, names))
+                errors = [pk for pk, ok in zip(ids, results) if not ok]
+                mark_ready([pk for pk, ok in zip(ids, results) if ok])
+                mark_failed(errors)
+                failed.update(errors)
+                total += len(ids)
+                self.stdout.write(
+                    f'Обработано картинок: {total}, '
+                    f'ошибок в пачке: {len(errors)}'
+                )
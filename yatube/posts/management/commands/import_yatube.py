@@ -0,0 +1,48 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import KINDS, Importer, read_records
+from posts.settings import IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Загружает группы, посты, комментарии и подписки из JSONL или '
+            'CSV (в том числе .gz) пачками через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument(
+            '--type', choices=KINDS,
+            help='Тип записей CSV и записей JSONL без поля type.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        importer = Importer(options['batch_size'])
+        started = perf_counter()
+        totals = dict.fromkeys(KINDS, 0)
+        skipped = 0
+        for path in options['paths']:
+            if '.csv' in path and not options['type']:
+                raise CommandError(f'Для {path} нужен --type.')
+            try:
+                for kind, written, missed in importer.run(
+                    read_records(path, options['type'])
+                ):
+                    totals[kind] += written
+                    skipped += missed
+                    self.stdout.write(self.summary(totals, skipped, started))
+            except (KeyError, ValueError) as error:
+                raise CommandError(f'{path}: {error!r}')
+        self.stdout.write('Готово. ' + self.summary(totals, skipped, started))
+
+    def summary(self, totals, skipped, started):
+        elapsed = perf_counter() - started
+        written = sum(totals.values())
+        counts = ', '.join(f'{kind}: {count}' for kind, count in
+                           totals.items())
+        return (f'{counts}, пропущено: {skipped}, '
+                f'{written / elapsed:.0f} строк/с')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Group, User
+from posts.settings import STATS_BATCH_SIZE
+from posts.stats import reconcile_groups, reconcile_users
+
+
+def _batches(queryset, size):
+    last = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last).order_by('pk').values_list(
+            'pk', flat=True
+        )[:size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, подписок и комментариев '
+            'пользователей и групп пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=STATS_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        for queryset, reconcile in [
+            (User.objects.all(), reconcile_users),
+            (Group.objects.all(), reconcile_groups),
+        ]:
+            total = 0
+            for ids in _batches(queryset, options['batch_size']):
+                reconcile(ids)
+                total += len(ids)
+            self.stdout.write(
+                f'{queryset.model._meta.verbose_name_plural}: {total}'
+            )
@@ -0,0 +1,145 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate, chain
+from time import perf_counter
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts.importer import Importer
+from posts.models import Post
+from posts.settings import IMPORT_BATCH_SIZE
+
+IMAGE_SIZE = (960, 540)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу правдоподобными данными через пакетный импорт: '
+            'пользователи, группы, посты с картинками, комментарии и '
+            'подписки со степенным распределением популярности авторов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Наибольшее число подписок одного пользователя.'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='Показатель степени популярности авторов.'
+        )
+        parser.add_argument('--images', type=int, default=20)
+        parser.add_argument('--image-ratio', type=float, default=0.3)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.now = timezone.now()
+        self.days = options['days']
+        usernames = [
+            f'{self.fake.user_name()}_{number}'
+            for number in range(options['users'])
+        ]
+        # Вес автора убывает со степенью его номера: немногие авторы
+        # собирают большую часть подписок и постов.
+        self.popular = list(accumulate(
+            1 / (rank + 1) ** options['alpha']
+            for rank in range(len(usernames))
+        ))
+        slugs = [f'group-{number}' for number in range(options['groups'])]
+        images = self.images(options['images'])
+        first_post = (Post.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        records = chain(
+            self.groups(slugs),
+            self.follows(usernames, options['follows']),
+            self.posts(
+                usernames, slugs, images, options['image_ratio'],
+                first_post, options['posts']
+            ),
+            self.comments(
+                usernames, first_post, options['posts'], options['comments']
+            ),
+        )
+        started = perf_counter()
+        totals = {}
+        for kind, written, _ in Importer(options['batch_size']).run(records):
+            totals[kind] = totals.get(kind, 0) + written
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            ', '.join(f'{kind}: {count}' for kind, count in totals.items())
+            + f' за {elapsed:.1f} с ({sum(totals.values()) / elapsed:.0f} '
+            'строк/с). Миниатюры готовит generate_thumbnails.'
+        )
+
+    def date(self):
+        return (self.now - timedelta(
+            seconds=self.rng.uniform(0, self.days * 24 * 60 * 60)
+        )).isoformat()
+
+    def author(self, usernames):
+        return self.rng.choices(usernames, cum_weights=self.popular)[0]
+
+    def images(self, count):
+        names = []
+        for number in range(count):
+            buffer = BytesIO()
+            Image.new('RGB', IMAGE_SIZE, tuple(
+                self.rng.randrange(256) for _ in range(3)
+            )).save(buffer, 'PNG')
+            names.append(default_storage.save(
+                f'posts/seed_{number}.png', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def groups(self, slugs):
+        for slug in slugs:
+            yield {
+                'type': 'group', 'slug': slug,
+                'title': self.fake.catch_phrase()[:200],
+                'description': self.fake.paragraph(),
+            }
+
+    def follows(self, usernames, limit):
+        for username in usernames:
+            for _ in range(self.rng.randint(0, limit)):
+                yield {
+                    'type': 'follow', 'user': username,
+                    'author': self.author(usernames),
+                }
+
+    def posts(self, usernames, slugs, images, image_ratio, first, count):
+        for pk in range(first, first + count):
+            with_image = images and self.rng.random() < image_ratio
+            yield {
+                'type': 'post', 'id': pk,
+                'author': self.author(usernames),
+                'group': self.rng.choice(slugs + [None]) if slugs else None,
+                'text': self.fake.text(),
+                'image': self.rng.choice(images) if with_image else '',
+                'pub_date': self.date(),
+            }
+
+    def comments(self, usernames, first_post, posts, count):
+        for _ in range(count if posts else 0):
+            yield {
+                'type': 'comment',
+                'post': first_post + self.rng.randrange(posts),
+                'author': self.rng.choice(usernames),
+                'text': self.fake.sentence(),
+                'created': self.date(),
+            }
@@ -0,0 +1,79 @@
+# Generated by Django 2.2.28 on 2026-10-18 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def _counts(queryset, field):
+    return dict(
+        queryset.values_list(field).annotate(count=Count('pk')).order_by()
+    )
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    posts = _counts(Post.objects, 'author_id')
+    followers = _counts(Follow.objects, 'author_id')
+    following = _counts(Follow.objects, 'user_id')
+    comments = _counts(Comment.objects, 'author_id')
+    UserStats.objects.bulk_create(
+        (UserStats(
+            user_id=pk,
+            posts=posts.get(pk, 0),
+            followers=followers.get(pk, 0),
+            following=following.get(pk, 0),
+            comments=comments.get(pk, 0),
+        ) for pk in User.objects.values_list('pk', flat=True).iterator()),
+        batch_size=500,
+    )
+    group_posts = _counts(Post.objects, 'group_id')
+    GroupStats.objects.bulk_create(
+        (GroupStats(group_id=pk, posts=group_posts.get(pk, 0))
+         for pk in Group.objects.values_list('pk', flat=True).iterator()),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0014_post_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts', models.IntegerField(default=0, verbose_name='Постов')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts', models.IntegerField(default=0, verbose_name='Постов')),
+                ('followers', models.IntegerField(default=0, verbose_name='Подписчиков')),
+                ('following', models.IntegerField(default=0, verbose_name='Подписок')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментариев')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
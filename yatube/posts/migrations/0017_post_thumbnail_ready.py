@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+def mark_posts_without_image(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.filter(image='').update(thumbnail_ready=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Миниатюры готовы'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(thumbnail_ready=False), fields=['pub_date'], name='post_thumbnail_pending_idx'),
+        ),
+        migrations.RunPython(
+            mark_posts_without_image, migrations.RunPython.noop
+        ),
+    ]
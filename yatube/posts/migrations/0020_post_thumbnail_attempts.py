@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_comment_post_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Неудачных попыток подготовить миниатюры'),
+        ),
+    ]
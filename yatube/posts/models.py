@@ -1,9 +1,18 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .signals import posts_bulk_created
+
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        posts = super().bulk_create(objs, *args, **kwargs)
+        posts_bulk_created.send(sender=self.model, posts=posts)
+        return posts
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название группы')
     slug = models.SlugField(unique=True, verbose_name='Идентификатор')
@@ -22,6 +31,9 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата публкации'
     )
+    modified = models.DateTimeField(
+        auto_now=True, verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -43,11 +55,36 @@ class Post(models.Model):
         blank=True,
         help_text='Необходимо добавить картинку для поста'
     )
+    thumbnail_ready = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Миниатюры готовы'
+    )
+    thumbnail_attempts = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Неудачных попыток подготовить миниатюры'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx'),
+            models.Index(
+                fields=['pub_date'],
+                name='post_thumbnail_pending_idx',
+                condition=models.Q(thumbnail_ready=False)),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -75,6 +112,11 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -107,3 +149,80 @@ class Follow(models.Model):
                 name='Нельзя подписываться на себя'),
 
         ]
+
+
+class Timeline(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации поста')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='Пост попадает в ленту один раз'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'),
+        ]
+
+
+class Celebrity(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='celebrity',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'Популярный автор'
+        verbose_name_plural = 'Популярные авторы'
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts = models.IntegerField(default=0, verbose_name='Постов')
+    followers = models.IntegerField(default=0, verbose_name='Подписчиков')
+    following = models.IntegerField(default=0, verbose_name='Подписок')
+    comments = models.IntegerField(default=0, verbose_name='Комментариев')
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts = models.IntegerField(default=0, verbose_name='Постов')
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
@@ -0,0 +1,96 @@
+import copy
+import threading
+
+from django.core.cache import cache
+from django.http import Http404
+
+from core import metrics
+from core.cache import page_version
+from core.routers import primary_reads
+
+from .models import Group, GroupStats, Post, User
+from .settings import OBJECT_CACHE_TIME
+
+OBJECT_KEY = 'object:{}:{}.{}'
+
+# Таблица групп целиком в памяти процесса вместе с версией 'groups',
+# под которой она прочитана.
+_groups = {'version': None, 'by_slug': {}, 'by_pk': {}}
+_groups_lock = threading.Lock()
+
+
+def _cached(kind, lookup, tags, load):
+    """Объект из кэша под версиями тегов или load() при промахе.
+
+    Запись объекта сбрасывает его тегом через bump(), поэтому ключ
+    с новой версией просто ещё пуст. Отсутствующие объекты не кэшируются.
+    """
+    key = OBJECT_KEY.format(kind, lookup, page_version(*tags))
+    value = cache.get(key)
+    if value is not None:
+        metrics.OBJECT_CACHE_HITS.inc(kind)
+        return value
+    metrics.OBJECT_CACHE_MISSES.inc(kind)
+    with primary_reads():
+        value = load()
+    if value is not None:
+        cache.set(key, value, OBJECT_CACHE_TIME)
+    return value
+
+
+def _or_404(value):
+    if value is None:
+        raise Http404
+    return value
+
+
+def post_or_404(post_id):
+    """Пост с автором, его счётчиками и группой для страницы поста."""
+    return _or_404(_cached(
+        'post', post_id, ('posts', 'groups', f'post:{post_id}'),
+        lambda: Post.objects.select_related(
+            'author__stats', 'group'
+        ).filter(pk=post_id).first()
+    ))
+
+
+def user_or_404(username):
+    """Автор со счётчиками; их меняют те же сигналы, что тег профиля."""
+    return _or_404(_cached(
+        'user', username, (f'profile:{username}',),
+        lambda: User.objects.select_related('stats').filter(
+            username=username
+        ).first()
+    ))
+
+
+def groups():
+    """Словари групп по slug и pk, перечитываются при смене 'groups'."""
+    version = page_version('groups')
+    with _groups_lock:
+        if _groups['version'] != version:
+            metrics.OBJECT_CACHE_MISSES.inc('group')
+            with primary_reads():
+                table = list(Group.objects.all())
+            _groups.update(
+                version=version,
+                by_slug={group.slug: group for group in table},
+                by_pk={group.pk: group for group in table},
+            )
+        else:
+            metrics.OBJECT_CACHE_HITS.inc('group')
+        return _groups['by_slug'], _groups['by_pk']
+
+
+def group_or_404(slug):
+    """Группа из таблицы в памяти и её счётчик постов из кэша объектов."""
+    group = _or_404(groups()[0].get(slug))
+    stats = _cached(
+        'group_stats', slug, (f'group:{slug}',),
+        lambda: GroupStats.objects.filter(group_id=group.pk).first()
+    )
+    # Копия: объекты таблицы общие для потоков процесса.
+    group = copy.deepcopy(group)
+    if stats is not None:
+        group.stats = stats
+    return group
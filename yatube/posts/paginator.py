@@ -0,0 +1,99 @@
+from datetime import datetime
+
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SALT = 'posts.paginator'
+AFTER = 'a'
+BEFORE = 'b'
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (key, pk) без COUNT и OFFSET.
+
+    Ссылки «вперёд/назад» несут непрозрачный подписанный курсор, поэтому
+    стоимость страницы не зависит от её глубины. Старые ссылки вида
+    ?page=N обслуживаются срезом без подсчёта общего числа записей.
+    Ключ — дата или число (например, релевантность поиска), порядок
+    всегда убывающий.
+    """
+
+    def __init__(self, object_list, per_page, key='pub_date'):
+        super().__init__(object_list, per_page)
+        self.key = key
+
+    def _ordered(self, descending=True):
+        sign = '-' if descending else ''
+        return self.object_list.order_by(
+            f'{sign}{self.key}', f'{sign}pk'
+        )
+
+    def _encode(self, direction, obj, number):
+        value = getattr(obj, self.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return signing.dumps(
+            [direction, value, obj.pk, number], salt=CURSOR_SALT
+        )
+
+    def _decode(self, cursor):
+        try:
+            direction, value, pk, number = signing.loads(
+                cursor, salt=CURSOR_SALT
+            )
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
+        if isinstance(value, str):
+            value = parse_datetime(value)
+        if direction not in (AFTER, BEFORE) or value is None:
+            return None
+        return direction, value, pk, number
+
+    def _after(self, value, pk):
+        return self._ordered().filter(
+            Q(**{f'{self.key}__lt': value})
+            | Q(**{self.key: value, 'pk__lt': pk}),
+            **{f'{self.key}__lte': value}
+        )
+
+    def _before(self, value, pk):
+        return self._ordered(descending=False).filter(
+            Q(**{f'{self.key}__gt': value})
+            | Q(**{self.key: value, 'pk__gt': pk}),
+            **{f'{self.key}__gte': value}
+        )
+
+    def _page(self, rows, number, has_next):
+        object_list = rows[:self.per_page]
+        self.num_pages = number + 1 if has_next else number
+        page = self._get_page(object_list, number, self)
+        page.next_cursor = page.previous_cursor = None
+        if has_next:
+            page.next_cursor = self._encode(AFTER, object_list[-1], number)
+        if number > 1 and object_list:
+            page.previous_cursor = self._encode(
+                BEFORE, object_list[0], number
+            )
+        return page
+
+    def get_page(self, number=None, cursor=None):
+        position = cursor and self._decode(cursor)
+        if position:
+            direction, value, pk, number = position
+            if direction == AFTER:
+                rows = list(self._after(value, pk)[:self.per_page + 1])
+                return self._page(rows, number + 1, len(rows) > self.per_page)
+            rows = list(self._before(value, pk)[:self.per_page + 1])
+            if len(rows) > self.per_page and number > 2:
+                return self._page(rows[self.per_page - 1::-1], number - 1,
+                                  True)
+            number = 1
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        offset = (number - 1) * self.per_page
+        rows = list(self._ordered()[offset:offset + self.per_page + 1])
+        return self._page(rows, number, len(rows) > self.per_page)
@@ -0,0 +1,240 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import bump
+
+from . import objects, search, stats, timeline
+from .models import (Comment, Follow, Group, GroupStats, Post, User,
+                     UserStats)
+from .signals import posts_bulk_created
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(posts_bulk_created, sender=Post)
+def fan_out_posts(sender, posts, **kwargs):
+    timeline.fan_out_bulk(posts)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.follow_created(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def purge_timeline(sender, instance, **kwargs):
+    timeline.follow_deleted(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, raw=False, **kwargs):
+    instance._previous_group_id = previous_image = None
+    if raw:
+        return
+    if instance.pk:
+        instance._previous_group_id, previous_image = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', 'image').first() or (None, None)
+    if not instance.image or instance.image.name != previous_image:
+        # Новую картинку подхватит generate_thumbnails, до этого
+        # шаблоны показывают исходное изображение.
+        instance.thumbnail_ready = not instance.image
+        instance.thumbnail_attempts = 0
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.change_user(instance.author_id, posts=1)
+        stats.change_group(instance.group_id, 1)
+    elif instance._previous_group_id != instance.group_id:
+        stats.change_group(instance._previous_group_id, -1)
+        stats.change_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    stats.change_user(instance.author_id, posts=-1)
+    stats.change_group(instance.group_id, -1)
+
+
+@receiver(posts_bulk_created, sender=Post)
+def count_posts(sender, posts, **kwargs):
+    stats.reconcile_users({post.author_id for post in posts})
+    stats.reconcile_groups(
+        {post.group_id for post in posts if post.group_id is not None}
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.change_user(instance.author_id, comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    stats.change_user(instance.author_id, comments=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.change_user(instance.user_id, following=1)
+        stats.change_user(instance.author_id, followers=1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    stats.change_user(instance.user_id, following=-1)
+    stats.change_user(instance.author_id, followers=-1)
+
+
+def _profiles(*user_ids):
+    return [
+        f'profile:{username}' for username in User.objects.filter(
+            pk__in=user_ids
+        ).values_list('username', flat=True)
+    ]
+
+
+def _groups(*group_ids):
+    by_pk = objects.groups()[1]
+    return [
+        f'group:{by_pk[pk].slug}' for pk in group_ids if pk in by_pk
+    ]
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump(
+        'posts',
+        f'post:{instance.pk}',
+        *_profiles(instance.author_id),
+        *_groups(
+            instance.group_id, getattr(instance, '_previous_group_id', None)
+        )
+    )
+
+
+@receiver(posts_bulk_created, sender=Post)
+def invalidate_bulk_post_pages(sender, posts, **kwargs):
+    bump(
+        'posts',
+        *_profiles(*{post.author_id for post in posts}),
+        *_groups(*{post.group_id for post in posts})
+    )
+
+
+@receiver(pre_save, sender=Group)
+def remember_slug(sender, instance, raw=False, **kwargs):
+    instance._previous_slug = None
+    if instance.pk and not raw:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)}
+    bump('posts', 'groups', *(f'group:{slug}' for slug in slugs if slug))
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    instance._previous_username = instance._previous_full_name = None
+    if instance.pk and not raw and update_fields != frozenset(['last_login']):
+        username, *full_name = User.objects.filter(pk=instance.pk).values_list(
+            'username', 'first_name', 'last_name'
+        ).first() or (None, None, None)
+        instance._previous_username = username
+        instance._previous_full_name = full_name
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_pages(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    # Вход обновляет только last_login, который страницы не выводят.
+    if raw or update_fields == frozenset(['last_login']):
+        return
+    previous = getattr(instance, '_previous_username', None)
+    scopes = {f'profile:{instance.username}'}
+    if previous and previous != instance.username:
+        # Имя пользователя есть в карточках постов на всех лентах.
+        scopes.update(['posts', f'profile:{previous}'])
+    elif getattr(instance, '_previous_full_name', None) not in (
+        None, [instance.first_name, instance.last_name]
+    ):
+        # Полное имя автора выводят только страницы его постов.
+        scopes.update(
+            f'post:{pk}' for pk in Post.objects.filter(
+                author=instance
+            ).values_list('pk', flat=True)
+        )
+    # Регистрация, смена пароля и прочие правки сбрасывают только
+    # профиль и закэшированный объект пользователя под его тегом.
+    bump(*scopes)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump(
+            f'feed:{instance.user_id}',
+            *_profiles(instance.user_id, instance.author_id)
+        )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump(f'post:{instance.post_id}', *_profiles(instance.author_id))
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(posts_bulk_created, sender=Post)
+def index_bulk_posts(sender, posts, **kwargs):
+    if all(post.pk for post in posts):
+        search.index_posts(posts)
+    else:
+        search.index_since(min(post.pub_date for post in posts))
@@ -0,0 +1,66 @@
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+# Ключ курсорной пагинации результатов: чем больше, тем релевантнее.
+SCORE = 'score'
+
+
+def _enabled():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Запрос пользователя как FTS5-выражение: все слова, без операторов."""
+    return ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in query.split()
+    )
+
+
+def index_posts(posts):
+    if not _enabled():
+        return
+    rows = [(post.pk, post.text) for post in posts]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk, text in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)', rows
+        )
+
+
+def unindex_post(pk):
+    if not _enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def index_since(pub_date):
+    """Добавляет в индекс посты, созданные через bulk_create."""
+    index_posts(Post.objects.filter(pub_date__gte=pub_date).only('text'))
+
+
+def search(query):
+    """Посты, содержащие все слова запроса, с релевантностью BM25.
+
+    SQLite не даёт вызвать bm25() во вложенном запросе, поэтому count()
+    по результату недоступен — пагинатор обходится без него.
+    """
+    if not _enabled():
+        return Post.objects.filter(text__icontains=query).annotate(
+            **{SCORE: Value(0.0, output_field=FloatField())}
+        )
+    return Post.objects.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = posts_post.id',
+               f'{FTS_TABLE} MATCH %s'],
+        params=[match_expression(query)],
+    ).annotate(**{SCORE: RawSQL(
+        f'-bm25({FTS_TABLE})', (), output_field=FloatField()
+    )}).order_by(f'-{SCORE}', '-pk')
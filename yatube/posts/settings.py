@@ -1 +1,22 @@
 POSTS_PER_PAGE = 14
+COMMENTS_PER_PAGE = 20
+# Авторы с таким числом подписчиков не раскладываются по лентам
+# при публикации, их посты подмешиваются в ленту при чтении.
+FANOUT_FOLLOWERS_LIMIT = 10000
+STATS_BATCH_SIZE = 500
+# Страницы сбрасываются сигналами при изменении данных, поэтому
+# могут жить в кэше долго.
+PAGE_CACHE_TIME = 60 * 60 * 6
+CARD_CACHE_TIME = 60 * 60 * 24
+OBJECT_CACHE_TIME = 60 * 60 * 6
+# Варианты миниатюр, которые готовятся заранее: (геометрия, параметры).
+THUMBNAIL_VARIANTS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+THUMBNAIL_BATCH_SIZE = 100
+# После стольких ошибок подряд картинка больше не берётся в обработку.
+THUMBNAIL_MAX_ATTEMPTS = 3
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+# Размер куска потоковой выгрузки в байтах.
+EXPORT_BUFFER_SIZE = 64 * 1024
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# bulk_create не отправляет post_save, поэтому менеджер постов
+# сообщает о массовой вставке отдельным сигналом.
+posts_bulk_created = Signal(providing_args=['posts'])
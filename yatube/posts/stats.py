@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Comment, Follow, GroupStats, Post, UserStats
+
+USER_FIELDS = ('posts', 'followers', 'following', 'comments')
+
+
+def _counts(queryset, field, ids):
+    return dict(
+        queryset.filter(**{f'{field}__in': ids})
+        .values_list(field)
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+
+def _save(model, key, stats, fields):
+    existing = set(model.objects.filter(
+        **{f'{key}__in': [getattr(item, key) for item in stats]}
+    ).values_list(key, flat=True))
+    model.objects.bulk_update(
+        [item for item in stats if getattr(item, key) in existing], fields
+    )
+    model.objects.bulk_create(
+        [item for item in stats if getattr(item, key) not in existing],
+        ignore_conflicts=True
+    )
+
+
+@transaction.atomic
+def reconcile_users(ids):
+    """Пересчитывает счётчики пользователей по исходным таблицам."""
+    ids = list(ids)
+    counts = {
+        'posts': _counts(Post.objects, 'author_id', ids),
+        'followers': _counts(Follow.objects, 'author_id', ids),
+        'following': _counts(Follow.objects, 'user_id', ids),
+        'comments': _counts(Comment.objects, 'author_id', ids),
+    }
+    _save(UserStats, 'user_id', [
+        UserStats(user_id=pk, **{
+            field: counts[field].get(pk, 0) for field in USER_FIELDS
+        }) for pk in ids
+    ], USER_FIELDS)
+
+
+@transaction.atomic
+def reconcile_groups(ids):
+    """Пересчитывает счётчики постов групп по таблице постов."""
+    ids = list(ids)
+    posts = _counts(Post.objects, 'group_id', ids)
+    _save(GroupStats, 'group_id', [
+        GroupStats(group_id=pk, posts=posts.get(pk, 0)) for pk in ids
+    ], ('posts',))
+
+
+def _change(model, key, deltas):
+    return model.objects.filter(**key).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def change_user(user_id, **deltas):
+    """Сдвигает счётчики пользователя, например change_user(1, posts=1).
+
+    Если строки статистики ещё нет, при увеличении она считается с нуля;
+    уменьшение без строки пропускается, так как это удаление пользователя.
+    """
+    updated = _change(UserStats, {'user_id': user_id}, deltas)
+    if not updated and max(deltas.values()) > 0:
+        reconcile_users([user_id])
+
+
+def change_group(group_id, delta):
+    if group_id is None:
+        return
+    updated = _change(GroupStats, {'group_id': group_id}, {'posts': delta})
+    if not updated and delta > 0:
+        reconcile_groups([group_id])
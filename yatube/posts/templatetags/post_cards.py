@@ -0,0 +1,50 @@
+from hashlib import md5
+
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..settings import CARD_CACHE_TIME
+from ..thumbnails import thumbnail_urls
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post.html'
+
+
+def card_key(post, hide_group):
+    """Ключ зависит от всего, что выводит карточка поста."""
+    group = post.group
+    stamp = '|'.join(map(str, [
+        post.modified.isoformat(),
+        post.author.username,
+        group.slug if group else '',
+        group.title if group else '',
+        hide_group,
+    ]))
+    return f'post_card:{post.pk}:{md5(stamp.encode()).hexdigest()}'
+
+
+@register.simple_tag
+def post_cards(posts, hide_group=False):
+    """Карточки постов страницы: одно чтение кэша на всю страницу."""
+    posts = list(posts)
+    keys = [card_key(post, hide_group) for post in posts]
+    cards = cache.get_many(keys)
+    misses = [
+        (key, post) for key, post in zip(keys, posts) if key not in cards
+    ]
+    urls = thumbnail_urls([post for key, post in misses])
+    missing = {
+        key: render_to_string(CARD_TEMPLATE, {
+            'post': post,
+            'hide_group_of_posts': hide_group,
+            'thumbnail_url': urls.get(post.pk),
+        })
+        for key, post in misses
+    }
+    if missing:
+        cache.set_many(missing, CARD_CACHE_TIME)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+USERNAME = 'TEST'
+USERNAME_2 = 'READER'
+SLUG = 'slug'
+URL_OF_INDEX = reverse('posts:index')
+URL_OF_GROUP = reverse('posts:group_list', args=[SLUG])
+URL_OF_PROFILE = reverse('posts:profile', args=[USERNAME])
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(title='Группа', slug=SLUG)
+        cls.post = Post.objects.create(
+            author=cls.author, text='<!--personal ["x", {}]-->',
+            group=cls.group
+        )
+        cls.urls = [
+            URL_OF_INDEX,
+            URL_OF_GROUP,
+            URL_OF_PROFILE,
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        ]
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_pages_served_from_cache(self):
+        """Повторный запрос анонима не трогает базу, даже сессию."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response['Vary'], 'Cookie')
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('max-age=60', response['Cache-Control'])
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_user_gets_cached_page_with_own_header(self):
+        for url in [URL_OF_INDEX, URL_OF_GROUP]:
+            with self.subTest(url=url):
+                self.client.get(url)
+                # Сессия и пользователь для шапки.
+                with self.assertNumQueries(2):
+                    response = self.reader_client.get(url)
+                self.assertContains(response, f'> {USERNAME_2} <')
+                self.assertNotContains(response, 'Войти')
+                self.assertIn('private', response['Cache-Control'])
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+        self.assertContains(
+            self.reader_client.get(URL_OF_INDEX), 'Избранные авторы'
+        )
+
+    def test_personalized_pages_render_fresh_for_users(self):
+        self.client.get(URL_OF_PROFILE)
+        response = self.reader_client.get(URL_OF_PROFILE)
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(self.client.get(URL_OF_PROFILE), 'Подписаться')
+
+    def test_changes_and_escaped_markers(self):
+        """Новый пост сбрасывает страницы, текст поста не подменяется."""
+        self.client.get(URL_OF_INDEX)
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertContains(self.client.get(URL_OF_INDEX), 'Новый пост')
+        response = self.reader_client.get(URL_OF_INDEX)
+        self.assertContains(response, '&lt;!--personal')
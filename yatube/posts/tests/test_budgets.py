@@ -0,0 +1,145 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from about.urls import urlpatterns as about_urls
+from users.urls import urlpatterns as users_urls
+
+from ..models import Celebrity, Comment, Follow, Group, Post, User
+from ..urls import urlpatterns as posts_urls
+from .utils import full_scans
+
+USERNAME = 'TEST'
+SLUG_OF_GROUP = 'test_slug'
+# Каждый размер досеивает столько авторов с постами, группами,
+# комментариями и подписками; бюджеты обязаны не меняться.
+SIZES = (1, 5, 20)
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username='reader')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(title='Группа', slug=SLUG_OF_GROUP)
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.guest = Client()
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.follower_client = Client()
+        cls.follower_client.force_login(cls.follower)
+
+    def seed(self, size):
+        start = User.objects.count()
+        for number in range(start, start + size):
+            author = User.objects.create_user(username=f'author_{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'slug_{number}'
+            )
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(author=author, text='Пост', group=group)
+            Post.objects.create(author=self.author, text='Пост', group=group)
+            Comment.objects.create(author=author, post=self.post, text='Ок')
+
+    def budgets(self):
+        """Маршрут: (клиент, аргументы, GET-параметры, число запросов)."""
+        username, pk = [USERNAME], [self.post.pk]
+        logout_client = Client()
+        logout_client.force_login(self.reader)
+        return {
+            'posts:index': (self.guest, None, {}, 1),
+            # Холодный кэш: таблица групп целиком, счётчик группы, посты.
+            'posts:group_list': (self.guest, [SLUG_OF_GROUP], {}, 3),
+            'posts:profile': (self.guest, username, {}, 2),
+            'posts:post_detail': (self.guest, pk, {}, 2),
+            'posts:post_comments': (self.guest, pk, {}, 2),
+            'posts:search': (self.guest, None, {'q': 'Пост'}, 1),
+            'posts:post_create': (self.author_client, None, {}, 5),
+            'posts:post_edit': (self.author_client, pk, {}, 6),
+            'posts:add_comment': (self.reader_client, pk, {}, 5),
+            'posts:follow_index': (self.reader_client, None, {}, 4),
+            'posts:profile_follow': (self.follower_client, username, {}, 13),
+            'posts:profile_unfollow': (
+                self.follower_client, username, {}, 10
+            ),
+            'posts:profile_export': (
+                self.author_client, username, {'format': 'jsonl'}, 5
+            ),
+            'users:signup': (self.guest, None, {}, 0),
+            'users:login': (self.guest, None, {}, 0),
+            'users:logout': (logout_client, None, {}, 4),
+            'users:pass_change': (self.reader_client, None, {}, 2),
+            'users:pass_change_done': (self.reader_client, None, {}, 2),
+            'about:author': (self.guest, None, {}, 0),
+            'about:tech': (self.guest, None, {}, 0),
+        }
+
+    def count_queries(self, client, url, data):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return context
+
+    def test_every_route_has_budget(self):
+        names = {
+            f'{namespace}:{pattern.name}' for namespace, patterns in [
+                ('posts', posts_urls),
+                ('users', users_urls),
+                ('about', about_urls),
+            ] for pattern in patterns
+        }
+        self.assertEqual(names - set(self.budgets()), set())
+
+    def test_query_budgets_hold_at_every_size(self):
+        """Число запросов каждого маршрута не растёт вместе с данными."""
+        for size in SIZES:
+            self.seed(size)
+            for name, (client, args, data, budget) in self.budgets().items():
+                with self.subTest(size=size, route=name):
+                    queries = self.count_queries(
+                        client, reverse(name, args=args), data
+                    )
+                    self.assertEqual(len(queries), budget, '\n'.join(
+                        query['sql'] for query in queries
+                    ))
+
+    def assertIndexed(self, client, url):
+        # Таблица групп нарочно читается в память процесса целиком.
+        table_loads = {str(Group.objects.all().query)}
+        page_obj = client.get(url).context.get('page_obj')
+        pages = [{}]
+        if page_obj and page_obj.next_cursor:
+            pages.append({'cursor': page_obj.next_cursor})
+        for data in pages:
+            for query in self.count_queries(client, url, data):
+                if query['sql'] in table_loads:
+                    continue
+                with self.subTest(url=url, data=data, sql=query['sql']):
+                    self.assertEqual(full_scans(query['sql']), [])
+
+    def test_feed_queries_use_indexes(self):
+        """EXPLAIN QUERY PLAN лент не содержит полного просмотра таблиц."""
+        self.seed(SIZES[-1])
+        for url in [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[SLUG_OF_GROUP]),
+            reverse('posts:profile', args=[USERNAME]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:post_comments', args=[self.post.pk]),
+        ]:
+            self.assertIndexed(self.guest, url)
+        self.assertIndexed(self.reader_client, reverse('posts:follow_index'))
+        # Посты популярных авторов подмешиваются в ленту другим запросом.
+        Celebrity.objects.create(author=self.author)
+        self.assertIndexed(self.reader_client, reverse('posts:follow_index'))
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Group, Post, User
+from ..templatetags.post_cards import card_key, post_cards
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TEST')
+        cls.group = Group.objects.create(title='Группа', slug='test_slug')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Текст карточки', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def posts(self):
+        return Post.objects.select_related('author', 'group')
+
+    def test_cards_are_cached(self):
+        """Повторная отрисовка берёт карточки из кэша."""
+        card, = post_cards(self.posts())
+        self.assertIn('Текст карточки', card)
+        self.assertEqual(
+            cache.get(card_key(self.post, False)), str(card)
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(post_cards(self.posts()), [card])
+        self.assertEqual(len(context), 1)
+
+    def test_changed_post_gets_new_card(self):
+        post_cards(self.posts())
+        self.post.text = 'Новый текст'
+        self.post.save()
+        card, = post_cards(self.posts())
+        self.assertIn('Новый текст', card)
+
+    def test_hidden_group_has_own_card(self):
+        card, = post_cards(self.posts())
+        hidden, = post_cards(self.posts(), hide_group=True)
+        self.assertIn(self.group.title, card)
+        self.assertNotIn(self.group.title, hidden)
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..settings import COMMENTS_PER_PAGE
+
+EXTRA_COMMENTS = 5
+
+
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TEST')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(author=cls.user, post=cls.post, text=f'Текст {number}')
+            for number in range(COMMENTS_PER_PAGE + EXTRA_COMMENTS)
+        )
+        cls.URL_OF_DETAIL_POST = reverse(
+            'posts:post_detail', args=[cls.post.pk]
+        )
+        cls.URL_OF_COMMENTS = reverse(
+            'posts:post_comments', args=[cls.post.pk]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_first_page_of_comments(self):
+        """Пост показывает первую страницу, остальное — фрагментами."""
+        comments = self.client.get(self.URL_OF_DETAIL_POST).context[
+            'comments'
+        ]
+        self.assertEqual(
+            list(comments),
+            list(Comment.objects.order_by('-created', '-pk')[
+                :COMMENTS_PER_PAGE
+            ])
+        )
+        response = self.client.get(
+            self.URL_OF_COMMENTS, {'cursor': comments.next_cursor}
+        )
+        self.assertTemplateUsed(
+            response, 'posts/includes/comment_list.html'
+        )
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(len(response.context['comments']), EXTRA_COMMENTS)
+
+    def test_comments_fragment_as_json(self):
+        data = self.client.get(self.URL_OF_COMMENTS, {'format': 'json'}).json()
+        self.assertEqual(len(data['comments']), COMMENTS_PER_PAGE)
+        data = self.client.get(self.URL_OF_COMMENTS, {
+            'format': 'json', 'cursor': data['next_cursor']
+        }).json()
+        self.assertEqual(len(data['comments']), EXTRA_COMMENTS)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_comments_of_missing_post(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk + 1])
+        )
+        self.assertEqual(response.status_code, 404)
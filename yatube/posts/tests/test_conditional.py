@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+USERNAME = 'TEST'
+USERNAME_2 = 'TEST2'
+SLUG = 'slug'
+URL_OF_INDEX = reverse('posts:index')
+URL_OF_GROUP = reverse('posts:group_list', args=[SLUG])
+URL_OF_PROFILE = reverse('posts:profile', args=[USERNAME])
+URL_OF_FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.user = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(title='Группа', slug=SLUG)
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+        cls.url_of_post = reverse('posts:post_detail', args=[cls.post.pk])
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertNotModified(self, client, url, queries):
+        etag = client.get(url)['ETag']
+        with self.assertNumQueries(queries):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_unchanged_pages_not_modified(self):
+        """Валидаторы дешевле страницы: версии тегов читаются из кэша."""
+        cases = [
+            (self.client, URL_OF_INDEX, 0),
+            (self.client, URL_OF_GROUP, 0),
+            (self.client, URL_OF_PROFILE, 0),
+            (self.client, self.url_of_post, 0),
+            # Сессия и пользователь.
+            (self.user_client, URL_OF_FOLLOW_INDEX, 2),
+        ]
+        for client, url, queries in cases:
+            with self.subTest(url=url):
+                self.assertNotModified(client, url, queries)
+
+    def test_user_pages_revalidated_by_browser(self):
+        """Срок кэша сервера не попадает в заголовки вошедшему."""
+        for url in [URL_OF_INDEX, URL_OF_GROUP, URL_OF_PROFILE]:
+            for _ in range(2):
+                with self.subTest(url=url):
+                    response = self.user_client.get(url)
+                    self.assertEqual(
+                        set(response['Cache-Control'].split(', ')),
+                        {'private', 'max-age=0'}
+                    )
+                    self.assertFalse(response.has_header('Expires'))
+                    self.assertTrue(response.has_header('ETag'))
+
+    def test_changes_refresh_etag(self):
+        """Посты, подписки и комментарии меняют ETag своих страниц."""
+        changes = [
+            (self.client, URL_OF_INDEX, lambda: Post.objects.create(
+                author=self.user, text='Новый пост'
+            )),
+            (self.client, URL_OF_PROFILE, lambda: Follow.objects.create(
+                user=self.user, author=self.author
+            )),
+            (self.client, self.url_of_post, lambda: Comment.objects.create(
+                author=self.user, post=self.post, text='Комментарий'
+            )),
+            (self.user_client, URL_OF_FOLLOW_INDEX,
+             lambda: Follow.objects.filter(user=self.user).delete()),
+        ]
+        for client, url, change in changes:
+            with self.subTest(url=url):
+                etag = client.get(url)['ETag']
+                change()
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        self.assertNotEqual(
+            self.client.get(URL_OF_INDEX)['ETag'],
+            self.user_client.get(URL_OF_INDEX)['ETag']
+        )
+
+    def test_post_edit_invalidates_dependent_pages(self):
+        """Правка поста сбрасывает ленты, профиль, группу и сам пост."""
+        Follow.objects.create(user=self.user, author=self.author)
+        author_client = Client()
+        author_client.force_login(self.author)
+        pages = [
+            (self.client, URL_OF_INDEX),
+            (self.client, URL_OF_GROUP),
+            (self.client, URL_OF_PROFILE),
+            (self.client, self.url_of_post),
+            (self.user_client, URL_OF_FOLLOW_INDEX),
+        ]
+        etags = [client.get(url)['ETag'] for client, url in pages]
+        author_client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Исправленный пост', 'group': self.group.pk}
+        )
+        for (client, url), etag in zip(pages, etags):
+            with self.subTest(url=url):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Исправленный пост')
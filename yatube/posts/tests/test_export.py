@@ -0,0 +1,64 @@
+import csv
+import gzip
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+USERNAME = 'TEST'
+URL_OF_EXPORT = reverse('posts:profile_export', args=[USERNAME])
+URL_OF_PROFILE = reverse('posts:profile', args=[USERNAME])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(title='Группа', slug='slug')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+        cls.comment = Comment.objects.create(
+            author=cls.author, post=cls.post, text='Комментарий'
+        )
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def test_export_streams_jsonl_csv_and_gzip(self):
+        """Выгрузка идёт потоком во всех форматах."""
+        response = self.author_client.get(URL_OF_EXPORT, {'format': 'jsonl'})
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [(row['type'], row['id'], row['text']) for row in rows],
+            [('post', self.post.pk, 'Пост'),
+             ('comment', self.comment.pk, 'Комментарий')]
+        )
+        self.assertEqual(rows[0]['group'], 'slug')
+        response = self.author_client.get(
+            URL_OF_EXPORT, {'format': 'csv', 'gzip': ''}
+        )
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        rows = list(csv.DictReader(StringIO(gzip.decompress(
+            b''.join(response.streaming_content)
+        ).decode())))
+        self.assertEqual([row['type'] for row in rows], ['post', 'comment'])
+
+    def test_export_only_for_owner(self):
+        user_client = Client()
+        user_client.force_login(User.objects.create_user(username='other'))
+        response = user_client.get(URL_OF_EXPORT, {'format': 'jsonl'})
+        self.assertRedirects(response, URL_OF_PROFILE)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export_yatube', USERNAME, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, Timeline, User
+
+RECORDS = [
+    {'type': 'group', 'slug': 'cats', 'title': 'Коты'},
+    {'type': 'post', 'id': 500, 'author': 'old', 'group': 'cats',
+     'text': 'Архивный пост', 'pub_date': '2015-01-01T10:00:00'},
+    {'type': 'post', 'id': 501, 'author': 'old', 'group': 'dogs',
+     'text': 'Пост несуществующей группы'},
+    {'type': 'comment', 'id': 7, 'post': 500, 'author': 'reader',
+     'text': 'Ок'},
+    {'type': 'comment', 'post': 999, 'author': 'reader', 'text': 'Мимо'},
+    {'type': 'follow', 'user': 'reader', 'author': 'old'},
+    {'type': 'follow', 'user': 'reader', 'author': 'old'},
+    {'type': 'follow', 'user': 'reader', 'author': 'reader'},
+]
+FOLLOWS_CSV = 'user,author\nold,reader\nold,old\n'
+
+
+class ImportTests(TestCase):
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_jsonl_and_csv(self):
+        """Импорт сохраняет даты, пропускает битые записи и дубли."""
+        path = self.write(
+            '.jsonl', '\n'.join(json.dumps(record) for record in RECORDS)
+        )
+        for _ in range(2):
+            call_command(
+                'import_yatube', path, batch_size=2, stdout=StringIO()
+            )
+        call_command(
+            'import_yatube', self.write('.csv', FOLLOWS_CSV),
+            type='follow', stdout=StringIO()
+        )
+        post = Post.objects.get()
+        self.assertEqual(post.pk, 500)
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group, Group.objects.get(slug='cats'))
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertEqual(Follow.objects.count(), 2)
+        reader = User.objects.get(username='reader')
+        self.assertTrue(
+            Timeline.objects.filter(user=reader, post=post).exists()
+        )
+        self.assertEqual(reader.stats.comments, 1)
+        self.assertEqual(post.author.stats.posts, 1)
+
+    def test_records_without_id_imported_once(self):
+        """Записи без id сверяются по автору, дате и тексту."""
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='old')
+        Follow.objects.create(user=reader, author=author)
+        records = [
+            {'type': 'post', 'author': 'old', 'text': 'Пост без id',
+             'pub_date': '2016-01-01T10:00:00'},
+            {'type': 'comment', 'post': 1, 'author': 'reader',
+             'text': 'Комментарий без id',
+             'created': '2016-01-02T10:00:00'},
+        ]
+        path = self.write(
+            '.jsonl', '\n'.join(json.dumps(record) for record in records)
+        )
+        for _ in range(2):
+            call_command('import_yatube', path, stdout=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(post.pub_date.year, 2016)
+        self.assertEqual(post.modified, post.pub_date)
+        self.assertEqual(Comment.objects.get().created.day, 2)
+        self.assertEqual(
+            Timeline.objects.get(user=reader).pub_date, post.pub_date
+        )
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_import_refreshes_cached_pages(self):
+        """Лента, пост и профиль видят подписки и комментарии импорта."""
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='old')
+        post = Post.objects.create(author=author, text='Пост автора')
+        client = Client()
+        client.force_login(reader)
+        url_of_feed = reverse('posts:follow_index')
+        url_of_post = reverse('posts:post_detail', args=[post.pk])
+        url_of_profile = reverse('posts:profile', args=['old'])
+        etag = client.get(url_of_feed)['ETag']
+        client.get(url_of_post)
+        client.get(url_of_profile)
+        records = [
+            {'type': 'comment', 'post': post.pk, 'author': 'reader',
+             'text': 'Импортированный комментарий'},
+            {'type': 'follow', 'user': 'reader', 'author': 'old'},
+        ]
+        path = self.write(
+            '.jsonl', '\n'.join(json.dumps(record) for record in records)
+        )
+        call_command('import_yatube', path, stdout=StringIO())
+        response = client.get(url_of_feed, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Пост автора')
+        self.assertContains(
+            client.get(url_of_post), 'Импортированный комментарий'
+        )
+        self.assertContains(
+            client.get(url_of_profile), 'Всего подписчиков: 1'
+        )
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core import metrics
+
+from ..models import Post, User
+
+URL_OF_INDEX = reverse('posts:index')
+URL_OF_METRICS = reverse('metrics')
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Post.objects.create(
+            author=User.objects.create_user(username='TEST'), text='Пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_header(self):
+        """Заголовок Server-Timing описывает SQL, шаблоны и кэш."""
+        timing = self.client.get(URL_OF_INDEX)['Server-Timing']
+        self.assertIn('desc="1 SQL"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('miss', timing)
+        timing = self.client.get(URL_OF_INDEX)['Server-Timing']
+        self.assertIn('desc="0 SQL"', timing)
+        self.assertIn('miss 0', timing)
+
+    def test_metrics_endpoint(self):
+        count = metrics.REQUEST_TIME.series['posts:index'][2]
+        self.client.get(URL_OF_INDEX)
+        self.assertEqual(
+            metrics.REQUEST_TIME.series['posts:index'][2], count + 1
+        )
+        response = self.client.get(URL_OF_METRICS)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; version=0.0.4'
+        )
+        self.assertContains(
+            response,
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"}'
+        )
+
+    def test_metrics_hidden_from_outside(self):
+        response = self.client.get(URL_OF_METRICS, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 404)
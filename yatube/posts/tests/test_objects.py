@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from core import metrics
+from core.cache import page_version
+
+from ..models import Comment, Follow, Group, Post, User
+from ..objects import group_or_404, post_or_404, user_or_404
+
+USERNAME = 'TEST'
+SLUG = 'slug'
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(title='Группа', slug=SLUG)
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_lookups_run_no_queries(self):
+        """Повторные поиски по ключу и slug обходятся без базы."""
+        hits = metrics.OBJECT_CACHE_HITS.series['post']
+        for lookup, arg in [
+            (post_or_404, self.post.pk),
+            (user_or_404, USERNAME),
+            (group_or_404, SLUG),
+        ]:
+            with self.subTest(lookup=lookup.__name__):
+                lookup(arg)
+                with self.assertNumQueries(0):
+                    lookup(arg)
+        with self.assertNumQueries(0):
+            post = post_or_404(self.post.pk)
+            self.assertEqual(post.author.stats.posts, 1)
+            self.assertEqual(post.group.title, 'Группа')
+        self.assertEqual(metrics.OBJECT_CACHE_HITS.series['post'], hits + 2)
+
+    def test_writes_invalidate_cached_objects(self):
+        post_or_404(self.post.pk)
+        user_or_404(USERNAME)
+        group_or_404(SLUG)
+        Post.objects.filter(pk=self.post.pk).update(text='Старый кэш')
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertEqual(post_or_404(self.post.pk).text, 'Исправленный пост')
+        Follow.objects.create(
+            user=User.objects.create_user(username='TEST2'),
+            author=self.author
+        )
+        self.assertEqual(user_or_404(USERNAME).stats.followers, 1)
+        Post.objects.create(author=self.author, text='Пост', group=self.group)
+        self.assertEqual(group_or_404(SLUG).stats.posts, 2)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(group_or_404(SLUG).title, 'Новое название')
+        self.assertEqual(
+            post_or_404(self.post.pk).group.title, 'Новое название'
+        )
+
+    def test_comment_and_rename_invalidate(self):
+        user_or_404(USERNAME)
+        Comment.objects.create(author=self.author, post=self.post, text='Ок')
+        self.assertEqual(user_or_404(USERNAME).stats.comments, 1)
+        self.author.username = 'RENAMED'
+        self.author.save()
+        with self.assertRaises(Http404):
+            user_or_404(USERNAME)
+        self.assertEqual(
+            post_or_404(self.post.pk).author.username, 'RENAMED'
+        )
+
+    def test_user_saves_bump_only_affected_pages(self):
+        """Регистрация и смена пароля не сбрасывают ленты."""
+        post_or_404(self.post.pk)
+        posts = page_version('posts')
+        user = User.objects.create_user(username='NEW')
+        user.set_password('secret')
+        user.save()
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Лев'
+        author.save()
+        self.assertEqual(page_version('posts'), posts)
+        self.assertEqual(
+            post_or_404(self.post.pk).author.get_full_name(), 'Лев'
+        )
+
+    def test_missing_objects_raise_404(self):
+        for lookup, arg in [
+            (post_or_404, 0),
+            (user_or_404, 'missing'),
+            (group_or_404, 'missing'),
+        ]:
+            with self.subTest(lookup=lookup.__name__):
+                with self.assertRaises(Http404):
+                    lookup(arg)
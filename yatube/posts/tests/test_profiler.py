@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import User
+
+URL_OF_INDEX = reverse('posts:index')
+URL_OF_PROFILES = reverse('profiles')
+PROFILE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILE_DIR=PROFILE_DIR, PROFILE_KEEP=2)
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='STAFF', is_staff=True)
+        cls.user = User.objects.create_user(username='TEST')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(PROFILE_DIR, ignore_errors=True)
+
+    def profiles(self):
+        if not os.path.isdir(PROFILE_DIR):
+            return []
+        return os.listdir(PROFILE_DIR)
+
+    def test_staff_request_is_profiled(self):
+        """Запрос сотрудника с флагом сохраняется и виден в списке."""
+        self.client.force_login(self.staff)
+        response = self.client.get(URL_OF_INDEX, {'_profile': ''})
+        name = response['X-Profile-Id']
+        self.assertEqual(self.profiles(), [name])
+        response = self.client.get(URL_OF_PROFILES)
+        self.assertContains(response, name)
+        response = self.client.get(
+            reverse('profile_download', args=[name])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content))
+
+    def test_header_flag_and_pruning(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get(URL_OF_INDEX, HTTP_X_PROFILE='1')
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_not_profiled(self):
+        """Без флага и для обычных пользователей профиль не пишется."""
+        self.client.get(URL_OF_INDEX, {'_profile': ''})
+        self.client.force_login(self.user)
+        response = self.client.get(URL_OF_INDEX, {'_profile': ''})
+        self.assertNotIn('X-Profile-Id', response)
+        self.client.force_login(self.staff)
+        self.client.get(URL_OF_INDEX)
+        self.assertEqual(self.profiles(), [])
+
+    def test_profiles_pages_are_staff_only(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(URL_OF_PROFILES).status_code, 302)
+        response = self.client.get(
+            reverse('profile_download', args=['db.sqlite3'])
+        )
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse('profile_download', args=['missing.pstats'])
+        )
+        self.assertEqual(response.status_code, 404)
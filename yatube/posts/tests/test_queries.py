@@ -0,0 +1,66 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..settings import POSTS_PER_PAGE
+from .utils import QueryCountMixin
+
+USERNAME = 'TEST'
+SLUG_OF_GROUP = 'test_slug'
+URL_OF_INDEX = reverse('posts:index')
+URL_OF_POSTS_OF_GROUP = reverse('posts:group_list', args=[SLUG_OF_GROUP])
+URL_OF_PROFILE = reverse('posts:profile', args=[USERNAME])
+URL_OF_INDEX_FOLLOW = reverse('posts:follow_index')
+
+
+class QueryCountTests(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug=SLUG_OF_GROUP)
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пост', group=cls.group
+        )
+        Comment.objects.create(author=cls.reader, post=cls.post, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.URL_OF_DETAIL_POST = reverse(
+            'posts:post_detail', args=[cls.post.pk]
+        )
+        cls.guest_client = Client()
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def add_posts(self):
+        for number in range(POSTS_PER_PAGE):
+            author = User.objects.create_user(username=f'author_{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'slug_{number}'
+            )
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(author=author, text='Пост', group=group)
+            Post.objects.create(author=self.user, text='Пост', group=group)
+            Post.objects.create(author=author, text='Пост', group=self.group)
+
+    def add_comments(self):
+        for number in range(POSTS_PER_PAGE):
+            Comment.objects.create(
+                author=User.objects.create_user(username=f'reader_{number}'),
+                post=self.post,
+                text='Комментарий'
+            )
+
+    def test_feeds_queries_do_not_grow_with_posts(self):
+        """Ленты грузят авторов и группы постоянным числом запросов."""
+        self.assertQueriesConstant([
+            [URL_OF_INDEX, self.guest_client],
+            [URL_OF_POSTS_OF_GROUP, self.guest_client],
+            [URL_OF_PROFILE, self.guest_client],
+            [URL_OF_INDEX_FOLLOW, self.reader_client],
+        ], self.add_posts)
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        self.assertQueriesConstant(
+            [[self.URL_OF_DETAIL_POST, self.guest_client]], self.add_comments
+        )
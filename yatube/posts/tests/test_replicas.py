@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import routers
+
+from ..models import Post, User
+from ..objects import user_or_404
+
+REPLICAS = ['replica_1', 'replica_2']
+USERNAME = 'TEST'
+URL_OF_INDEX = reverse('posts:index')
+URL_OF_PROFILE = reverse('posts:profile', args=[USERNAME])
+URL_OF_CREATE = reverse('posts:post_create')
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaTests(TransactionTestCase):
+    """Основная база и две реплики — отдельные файлы SQLite.
+
+    Репликации между ними нет, поэтому видно, откуда читал запрос.
+    """
+
+    databases = {'default', *REPLICAS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        for alias in REPLICAS:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': f'{cls.directory}/{alias}.sqlite3',
+            }
+            connections.ensure_defaults(alias)
+            connections.prepare_test_settings(alias)
+            call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections.databases[alias]
+            delattr(connections._connections, alias)
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=USERNAME)
+        for alias in REPLICAS:
+            self.user.save(using=alias)
+        Post.objects.create(author=self.user, text='Только в основной')
+        routers.unpin()
+
+    def tearDown(self):
+        routers.unpin()
+
+    def test_reads_go_to_replicas(self):
+        self.assertFalse(Post.objects.exists())
+
+    def test_cache_fill_reads_from_primary(self):
+        """Страница и объекты для кэша читаются из основной базы."""
+        response = self.client.get(URL_OF_INDEX)
+        self.assertContains(response, 'Только в основной')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(user_or_404(USERNAME).stats.posts, 1)
+        with routers.primary_reads():
+            self.assertTrue(Post.objects.exists())
+        self.assertFalse(routers.pinned())
+        self.assertFalse(Post.objects.exists())
+
+    def test_writer_reads_own_writes(self):
+        """После записи сессия читает из основной базы, минуя кэш страниц."""
+        writer = Client()
+        writer.force_login(self.user)
+        response = writer.post(URL_OF_CREATE, {'text': 'Новый пост'})
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertFalse(Post.objects.filter(text='Новый пост').exists())
+        self.assertContains(writer.get(URL_OF_PROFILE), 'Новый пост')
+        self.assertTrue(
+            Post.objects.using('default').filter(text='Новый пост').exists()
+        )
+        self.assertFalse(
+            Post.objects.using(REPLICAS[0]).filter(text='Новый пост').exists()
+        )
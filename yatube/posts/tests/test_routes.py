@@ -14,9 +14,12 @@ CASES = [
     ['post_edit', f'/posts/{POST_ID}/edit/', [POST_ID]],
     ['post_create', '/create/', None],
     ['add_comment', f'/posts/{POST_ID}/comment/', [POST_ID]],
+    ['post_comments', f'/posts/{POST_ID}/comments/', [POST_ID]],
     ['follow_index', '/follow/', None],
+    ['search', '/search/', None],
     ['profile_follow', f'/profile/{USERNAME}/follow/', [USERNAME]],
     ['profile_unfollow', f'/profile/{USERNAME}/unfollow/', [USERNAME]],
+    ['profile_export', f'/profile/{USERNAME}/export/', [USERNAME]],
 ]
 
 
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import search
+
+URL_OF_SEARCH = reverse('posts:search')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TEST')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_search_ranks_and_follows_edits(self):
+        """Поиск находит все слова, учитывает правку и удаление поста."""
+        rare = Post.objects.create(
+            author=self.user, text='Котики котики и ещё раз котики'
+        )
+        often = Post.objects.create(
+            author=self.user, text='Про котики и собак немного'
+        )
+        Post.objects.create(author=self.user, text='Только собаки')
+        self.assertEqual(list(search('котики')), [rare, often])
+        self.assertEqual(list(search('КОТИКИ собак')), [often])
+        often.text = 'Уже про хомяков'
+        often.save()
+        self.assertEqual(list(search('собак')), [])
+        self.assertEqual(list(search('хомяков')), [often])
+        rare.delete()
+        self.assertEqual(list(search('котики')), [])
+
+    def test_bulk_created_posts_indexed(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пакетный пост {number}')
+            for number in range(3)
+        )
+        self.assertEqual(len(search('пакетный')), 3)
+
+    def test_search_page_paginated_by_cursor(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Поиск ' + 'слово ' * number)
+            for number in range(1, 17)
+        )
+        response = self.client.get(URL_OF_SEARCH, {'q': 'слово'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 14)
+        self.assertContains(response, 'q=%D1%81%D0%BB%D0%BE%D0%B2%D0%BE&')
+        response = self.client.get(
+            URL_OF_SEARCH, {'q': 'слово', 'cursor': page_obj.next_cursor}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_operators_in_query_are_words(self):
+        Post.objects.create(author=self.user, text='Текст с NOT внутри')
+        self.assertEqual(list(search('"NOT" OR *')), [])
+        self.assertEqual(len(search('not')), 1)
@@ -0,0 +1,43 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Comment, Follow, Post, Timeline
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedBenchTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_then_bench(self):
+        """seed наполняет базу, bench пишет задержки всех страниц в JSON."""
+        call_command(
+            'seed', users=10, groups=2, posts=30, comments=20, images=1,
+            stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 20)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Timeline.objects.exists())
+        output = os.path.join(TEMP_MEDIA_ROOT, 'bench.json')
+        call_command(
+            'bench', requests=3, cold=True, output=output, stdout=StringIO()
+        )
+        with open(output) as file:
+            routes = json.load(file)['routes']
+        self.assertIn('posts:follow_index', routes)
+        for name, result in routes.items():
+            with self.subTest(route=name):
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertGreater(result['queries'], 0)
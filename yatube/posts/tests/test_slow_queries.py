@@ -0,0 +1,64 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import SlowQueryLog, normalize
+
+from ..models import Follow, Post, User
+
+URL_OF_INDEX_FOLLOW = reverse('posts:follow_index')
+
+
+@override_settings(SLOW_QUERY_MS=0)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='TEST')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=author)
+        Post.objects.create(author=author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def entries(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_slow_queries_attributed_to_view(self):
+        """Запись несёт шаблон SQL, имя маршрута и строку кода проекта."""
+        client = Client()
+        client.force_login(self.reader)
+        with self.assertLogs('yatube.slow_queries') as logs:
+            client.get(URL_OF_INDEX_FOLLOW)
+        entries = self.entries(logs)
+        self.assertEqual(
+            {entry['url_name'] for entry in entries}, {'posts:follow_index'}
+        )
+        self.assertIn(
+            'posts/paginator.py', [
+                entry['code'].split(':')[0] for entry in entries
+            ]
+        )
+
+    def test_slow_queries_attributed_to_template(self):
+        template = Template('\n{{ users.count }}')
+        with self.assertLogs('yatube.slow_queries') as logs:
+            with connection.execute_wrapper(
+                SlowQueryLog(RequestFactory().get('/'))
+            ):
+                template.render(Context({'users': User.objects.all()}))
+        [entry] = self.entries(logs)
+        self.assertEqual(entry['template'], '<unknown source>:2')
+        self.assertTrue(entry['code'].startswith('posts/tests/'))
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize("SELECT  a FROM t WHERE b IN (%s, %s) AND c = 'x''y'"
+                      ' LIMIT 21'),
+            'SELECT a FROM t WHERE b IN (...) AND c = %s LIMIT %s'
+        )
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.sqlite import configure
+
+URL_OF_INDEX = reverse('posts:index')
+
+
+def pragma(cursor, name):
+    return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+class SqliteTests(TestCase):
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(pragma(cursor, 'synchronous'), 1)
+            self.assertEqual(pragma(cursor, 'busy_timeout'), 5000)
+            self.assertEqual(pragma(cursor, 'temp_store'), 2)
+
+    def test_file_database_switches_to_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = sqlite3.connect(os.path.join(directory, 'db'))
+            configure(database.cursor())
+            self.assertEqual(pragma(database, 'journal_mode'), 'wal')
+            database.close()
+
+    def test_optimize_runs_after_interval(self):
+        """PRAGMA optimize выполняется после запроса раз в интервал."""
+        connection.ensure_connection()
+        connection.optimized_at -= settings.SQLITE_OPTIMIZE_INTERVAL
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(URL_OF_INDEX)
+            self.client.get(URL_OF_INDEX)
+        optimized = [
+            query for query in queries if query['sql'] == 'PRAGMA optimize'
+        ]
+        self.assertEqual(len(optimized), 1)
@@ -0,0 +1,73 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.cache import LEASE_KEY, get_or_compute
+
+KEY = 'expensive'
+
+
+class StampedeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'значение {self.calls}'
+
+    def test_value_is_computed_once(self):
+        for _ in range(3):
+            self.assertEqual(
+                get_or_compute(KEY, self.compute, 60), 'значение 1'
+            )
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_leased(self):
+        """Пока пересчитывает другой запрос, отдаётся устаревшее значение."""
+        cache.set(KEY, ('устаревшее', time.time() - 1, 0.1))
+        cache.add(LEASE_KEY.format(KEY), True)
+        self.assertEqual(get_or_compute(KEY, self.compute, 60), 'устаревшее')
+        self.assertEqual(self.calls, 0)
+        cache.delete(LEASE_KEY.format(KEY))
+        self.assertEqual(get_or_compute(KEY, self.compute, 60), 'значение 1')
+
+    def test_waits_for_lease_holder_without_stale_value(self):
+        cache.add(LEASE_KEY.format(KEY), True)
+        threading.Timer(
+            0.1, lambda: cache.set(KEY, ('от соседа', time.time() + 60, 0))
+        ).start()
+        self.assertEqual(get_or_compute(KEY, self.compute, 60), 'от соседа')
+        self.assertEqual(self.calls, 0)
+
+    def test_wait_for_lease_holder_is_bounded(self):
+        """Не дождавшись соседа за LEASE_WAIT, запрос считает сам."""
+        cache.add(LEASE_KEY.format(KEY), True)
+        with mock.patch('core.cache.LEASE_WAIT', 0.1):
+            started = time.monotonic()
+            self.assertEqual(
+                get_or_compute(KEY, self.compute, 60), 'значение 1'
+            )
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_early_refresh_before_expiry(self):
+        """Дорогое значение у края срока пересчитывается заранее."""
+        cache.set(KEY, ('почти истекло', time.time() + 1, 0.5))
+        with mock.patch('core.cache.random.random', return_value=0.99):
+            self.assertEqual(
+                get_or_compute(KEY, self.compute, 60), 'значение 1'
+            )
+        with mock.patch('core.cache.random.random', return_value=0.0):
+            self.assertEqual(
+                get_or_compute(KEY, self.compute, 60), 'значение 1'
+            )
+        self.assertEqual(self.calls, 1)
+
+    def test_none_is_not_cached(self):
+        get_or_compute(KEY, lambda: None, 60)
+        self.assertIsNone(cache.get(KEY))
+        self.assertTrue(cache.add(LEASE_KEY.format(KEY), True))
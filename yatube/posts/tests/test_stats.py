@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import (Comment, Follow, Group, GroupStats, Post, User,
+                      UserStats)
+
+
+class StatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TEST')
+        cls.user_2 = User.objects.create_user(username='TEST2')
+        cls.group = Group.objects.create(title='Группа 1', slug='slug_1')
+        cls.group_2 = Group.objects.create(title='Группа 2', slug='slug_2')
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def group_posts(self, group):
+        return GroupStats.objects.get(group=group).posts
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются вместе с постами, комментариями и подписками."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        Comment.objects.create(author=self.user_2, post=post, text='Ок')
+        Follow.objects.create(user=self.user_2, author=self.user)
+        self.assertStats(self.user, posts=1, followers=1, following=0)
+        self.assertStats(self.user_2, comments=1, following=1)
+        self.assertEqual(self.group_posts(self.group), 1)
+        post.delete()
+        Follow.objects.all().delete()
+        self.assertStats(self.user, posts=0, followers=0)
+        self.assertStats(self.user_2, comments=0, following=0)
+
+    def test_group_change_moves_counter(self):
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        post.group = self.group_2
+        post.save()
+        self.assertEqual(self.group_posts(self.group), 0)
+        self.assertEqual(self.group_posts(self.group_2), 1)
+
+    def test_bulk_create_is_counted(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {number}', group=self.group)
+            for number in range(3)
+        )
+        self.assertStats(self.user, posts=3)
+        self.assertEqual(self.group_posts(self.group), 3)
+
+    def test_reconcile_fixes_drift(self):
+        Post.objects.create(author=self.user, text='Пост')
+        UserStats.objects.filter(user=self.user).update(posts=10)
+        UserStats.objects.filter(user=self.user_2).delete()
+        call_command('reconcile_stats', batch_size=1, stdout=StringIO())
+        self.assertStats(self.user, posts=1)
+        self.assertStats(self.user_2, posts=0)
@@ -0,0 +1,175 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.models import KVStore
+
+from ..models import Post, User
+from ..settings import (
+    POSTS_PER_PAGE, THUMBNAIL_MAX_ATTEMPTS, THUMBNAIL_VARIANTS
+)
+from ..thumbnails import (
+    _thumbnail_file, generate, mark_ready, pending, thumbnail_urls
+)
+from .utils import QueryCountMixin
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+USERNAME = 'TEST'
+URL_OF_PROFILE = reverse('posts:profile', args=[USERNAME])
+URL_OF_INDEX = reverse('posts:index')
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class InlineExecutor:
+    """Пул без процессов: тестовая база в памяти не видна дочерним."""
+
+    def __init__(self, workers):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    map = staticmethod(map)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_thumbnails_generated_outside_request(self):
+        """До обработки показывается оригинал, после — миниатюра."""
+        self.author_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        })
+        post = Post.objects.get()
+        self.assertFalse(post.thumbnail_ready)
+        self.assertContains(
+            self.author_client.get(URL_OF_PROFILE), post.image.url
+        )
+        with mock.patch(
+            'posts.management.commands.generate_thumbnails.'
+            'ProcessPoolExecutor', InlineExecutor
+        ):
+            call_command('generate_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_ready)
+        response = self.author_client.get(URL_OF_PROFILE)
+        self.assertNotContains(response, post.image.url)
+        self.assertContains(response, settings.MEDIA_URL + 'cache/')
+
+    def test_failed_thumbnails_stay_pending(self):
+        """Ошибка не отмечает миниатюры готовыми, попытки ограничены."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Битая картинка',
+            image=SimpleUploadedFile('broken.gif', b'broken', 'image/gif')
+        )
+        with mock.patch(
+            'posts.management.commands.generate_thumbnails.'
+            'ProcessPoolExecutor', InlineExecutor
+        ):
+            for attempt in range(THUMBNAIL_MAX_ATTEMPTS + 1):
+                call_command('generate_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail_ready)
+        self.assertEqual(post.thumbnail_attempts, THUMBNAIL_MAX_ATTEMPTS)
+        self.assertFalse(pending().exists())
+
+    def test_post_without_image_is_ready(self):
+        post = Post.objects.create(author=self.user, text='Без картинки')
+        self.assertTrue(post.thumbnail_ready)
+
+    def add_image_posts(self, count=1):
+        for number in range(count):
+            post = Post.objects.create(
+                author=self.user,
+                text=f'Пост {number}',
+                image=SimpleUploadedFile(
+                    f'small_{number}.gif', SMALL_GIF, 'image/gif'
+                )
+            )
+            generate(post.image.name)
+            mark_ready([post.pk])
+
+    def test_thumbnail_names_match_sorl(self):
+        """Имена миниатюр считаются так же, как в get_thumbnail."""
+        self.add_image_posts()
+        image = Post.objects.get().image
+        for geometry, options in THUMBNAIL_VARIANTS:
+            self.assertEqual(
+                _thumbnail_file(image, geometry, options).name,
+                get_thumbnail(image, geometry, **options).name
+            )
+
+    def test_lost_thumbnails_requeued_by_worker(self):
+        """Страница не пишет в базу, пропажу находит generate_thumbnails."""
+        self.add_image_posts()
+        post = Post.objects.get()
+        KVStore.objects.all().delete()
+        default.kvstore.cache.clear()
+        # Единственный запрос — чтение таблицы хранилища sorl.
+        with self.assertNumQueries(1):
+            self.assertEqual(thumbnail_urls([post]), {})
+        # Отсутствие записи запомнено в кэше.
+        with self.assertNumQueries(0):
+            self.assertEqual(thumbnail_urls([post]), {})
+        self.assertContains(
+            self.author_client.get(URL_OF_PROFILE), post.image.url
+        )
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_ready)
+        with mock.patch(
+            'posts.management.commands.generate_thumbnails.'
+            'ProcessPoolExecutor', InlineExecutor
+        ):
+            call_command(
+                'generate_thumbnails', '--requeue-lost', stdout=StringIO()
+            )
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_ready)
+        self.assertEqual(thumbnail_urls([post]).keys(), {post.pk})
+
+    def test_thumbnail_lookups_batched_per_page(self):
+        """Чтение миниатюр страницы не растёт с числом картинок."""
+        self.add_image_posts()
+        self.assertQueriesConstant(
+            [[URL_OF_INDEX, self.author_client]],
+            lambda: self.add_image_posts(POSTS_PER_PAGE)
+        )
+        self.assertContains(
+            self.author_client.get(URL_OF_INDEX),
+            settings.MEDIA_URL + 'cache/',
+            count=POSTS_PER_PAGE
+        )
@@ -0,0 +1,88 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core import metrics
+from core.tiered_cache import LocalTier, TwoTierCache
+
+WRITER = (
+    'import sys; from core.tiered_cache import SQLiteCache; '
+    'SQLiteCache(sys.argv[1], {}).set("key", "из другого процесса")'
+)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = TwoTierCache(self.location, {
+            'OPTIONS': {'LOCAL_MAX_ENTRIES': 2, 'SYNC_INTERVAL': 0},
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def events(self):
+        return dict(metrics.LOCAL_CACHE.series)
+
+    def test_local_hits_and_eviction(self):
+        """Локальный уровень ограничен, вытеснения попадают в метрики."""
+        before = self.events()
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(list(self.cache.tier.items), [':1:b', ':1:c'])
+        self.assertEqual(self.cache.get('c'), 3)
+        self.assertEqual(self.cache.get('a'), 1)
+        events = self.events()
+        self.assertEqual(events['eviction'] - before.get('eviction', 0), 2)
+        self.assertEqual(events['hit'] - before.get('hit', 0), 1)
+        self.assertEqual(events['miss'] - before.get('miss', 0), 1)
+
+    def test_other_process_write_invalidates_local_copy(self):
+        self.cache.set('key', 'старое')
+        self.assertEqual(self.cache.get('key'), 'старое')
+        subprocess.run(
+            [sys.executable, '-c', WRITER, self.location],
+            cwd=settings.BASE_DIR, check=True
+        )
+        self.assertEqual(self.cache.get('key'), 'из другого процесса')
+
+    def test_local_hits_skip_journal_within_sync_interval(self):
+        """Журнал читается раз в SYNC_INTERVAL, а не на каждое чтение."""
+        self.cache.sync_interval = 60
+        self.cache.set('key', 'старое')
+        self.cache.get('key')
+        subprocess.run(
+            [sys.executable, '-c', WRITER, self.location],
+            cwd=settings.BASE_DIR, check=True
+        )
+        with mock.patch.object(self.cache.shared, 'changes') as changes:
+            self.assertEqual(self.cache.get('key'), 'старое')
+        changes.assert_not_called()
+        self.cache.tier.synced -= 60
+        self.assertEqual(self.cache.get('key'), 'из другого процесса')
+
+    def test_incr_and_clear_go_through_shared_tier(self):
+        other = TwoTierCache(self.location, {
+            'OPTIONS': {'SYNC_INTERVAL': 0},
+        })
+        # Отдельный локальный уровень, как у другого воркера.
+        other.tier = LocalTier(10, 60)
+        other.tier.seq = other.shared.last_change()
+        self.cache.set('counter', 1, None)
+        self.assertEqual(other.get('counter'), 1)
+        self.cache.incr('counter')
+        self.assertEqual(other.get('counter'), 2)
+        self.cache.clear()
+        self.assertIsNone(other.get('counter'))
+        self.assertFalse(other.tier.items)
+
+    def test_cached_values_are_copies(self):
+        self.cache.set('list', [1])
+        self.cache.get('list').append(2)
+        self.assertEqual(self.cache.get('list'), [1])
@@ -0,0 +1,81 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Celebrity, Follow, Post, Timeline, User
+from ..timeline import feed
+
+USERNAME = 'TEST'
+USERNAME_2 = 'TEST2'
+USERNAME_3 = 'TEST3'
+URL_OF_INDEX_FOLLOW = reverse('posts:follow_index')
+URL_OF_FOLLOW = reverse('posts:profile_follow', args=[USERNAME])
+URL_OF_UNFOLLOW = reverse('posts:profile_unfollow', args=[USERNAME])
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.user = User.objects.create_user(username=USERNAME_2)
+        cls.user_2 = User.objects.create_user(username=USERNAME_3)
+        cls.post = Post.objects.create(author=cls.author, text='Старый пост')
+        cls.client_2 = Client()
+        cls.client_2.force_login(cls.user)
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        """Подписка заполняет ленту, отписка очищает её."""
+        self.client_2.get(URL_OF_FOLLOW)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.user, post=self.post).exists()
+        )
+        self.client_2.get(URL_OF_UNFOLLOW)
+        self.assertFalse(Timeline.objects.filter(user=self.user).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(
+            list(feed(self.user)), [post, self.post]
+        )
+        self.assertEqual(list(feed(self.user_2)), [])
+
+    def test_bulk_created_posts_fan_out(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}')
+            for number in range(3)
+        )
+        self.assertEqual(
+            Timeline.objects.filter(user=self.user).count(), 4
+        )
+
+    def test_celebrity_posts_merged_on_read(self):
+        """Посты популярного автора не раскладываются, а подмешиваются."""
+        with mock.patch('posts.timeline.FANOUT_FOLLOWERS_LIMIT', 2):
+            Follow.objects.create(user=self.user, author=self.author)
+            Follow.objects.create(user=self.user_2, author=self.author)
+            self.assertTrue(
+                Celebrity.objects.filter(author=self.author).exists()
+            )
+            post = Post.objects.create(author=self.author, text='Новый пост')
+            self.assertFalse(
+                Timeline.objects.filter(user=self.user_2).exists()
+            )
+            self.assertEqual(list(feed(self.user_2)), [post, self.post])
+            response = self.client_2.get(URL_OF_INDEX_FOLLOW)
+            self.assertEqual(len(response.context['page_obj']), 2)
+            Follow.objects.filter(user=self.user).delete()
+            self.assertEqual(list(feed(self.user_2)), [post, self.post])
+            call_command('demote_celebrities', stdout=StringIO())
+            self.assertFalse(
+                Celebrity.objects.filter(author=self.author).exists()
+            )
+            self.assertEqual(
+                Timeline.objects.filter(user=self.user_2).count(), 2
+            )
+            self.assertEqual(list(feed(self.user_2)), [post, self.post])
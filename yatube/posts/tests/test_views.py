@@ -130,13 +130,25 @@ class PostPagesTests(TestCase):
 
     def test_caching_page_of_index(self):
         response = self.guest_client.get(URL_OF_INDEX)
-        Post.objects.all().delete()
+        Post.objects.all().update(text='Изменено в обход сигналов')
         response_2 = self.guest_client.get(URL_OF_INDEX)
         self.assertEqual(response.content, response_2.content)
         cache.clear()
         response_3 = self.guest_client.get(URL_OF_INDEX)
         self.assertNotEqual(response.content, response_3.content)
 
+    def test_cached_pages_invalidated_by_signals(self):
+        """Кэш страниц сбрасывается сразу после изменения постов."""
+        urls = [URL_OF_INDEX, URL_OF_POSTS_OF_GROUP, URL_OF_PROFILE]
+        responses = [self.guest_client.get(url) for url in urls]
+        Post.objects.create(
+            author=self.user, text='Свежий пост', group=self.group
+        )
+        for url, response in zip(urls, responses):
+            with self.subTest(url=url):
+                self.assertNotContains(response, 'Свежий пост')
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
     def test_profile_follow(self):
         Follow.objects.all().delete()
         self.authorized_client.get(URL_OF_FOLLOW)
@@ -190,6 +202,9 @@ class PaginatorViewsTest(TestCase):
         cls.authorized_client = Client()
         cls.authorized_client.force_login(cls.user_2)
 
+    def setUp(self):
+        cache.clear()
+
     def test_paginator(self):
         cases = [
             [URL_OF_INDEX, self.guest_client, POSTS_PER_PAGE],
@@ -207,3 +222,27 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(
                     len(response.context.get('page_obj')), expected
                 )
+
+    def test_cursor_paginator(self):
+        """Курсоры ведут на соседние страницы."""
+        for url in [URL_OF_POSTS_OF_GROUP, URL_OF_PROFILE]:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url).context['page_obj']
+                self.assertIsNone(first.previous_cursor)
+                second = self.guest_client.get(
+                    url, {'cursor': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(second.number, 2)
+                self.assertEqual(len(second), 1)
+                self.assertIsNone(second.next_cursor)
+                self.assertNotIn(second[0], list(first))
+                back = self.guest_client.get(
+                    url, {'cursor': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_invalid_cursor_shows_first_page(self):
+        response = self.guest_client.get(URL_OF_PROFILE, {'cursor': 'broken'})
+        self.assertEqual(
+            len(response.context['page_obj']), POSTS_PER_PAGE
+        )
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def full_scans(sql):
+    """Строки плана SQLite с полным просмотром таблицы без индекса."""
+    if not sql.startswith('SELECT'):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    return [
+        detail for detail in details
+        if detail.startswith('SCAN') and 'USING' not in detail
+        and 'VIRTUAL TABLE' not in detail
+    ]
+
+
+class QueryCountMixin:
+    """Проверка того, что число запросов страниц не зависит от данных."""
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        return len(context)
+
+    def assertQueriesConstant(self, cases, add_rows):
+        """cases — список пар [url, client], add_rows добавляет строки."""
+        for url, client in cases:
+            client.get(url)
+        before = [self.count_queries(client, url) for url, client in cases]
+        add_rows()
+        for (url, client), expected in zip(cases, before):
+            with self.subTest(url=url):
+                queries = self.count_queries(client, url)
+                self.assertEqual(
+                    queries, expected,
+                    f'Число запросов `{url}` растёт вместе с числом строк: '
+                    f'{expected} -> {queries}'
+                )
@@ -0,0 +1,174 @@
+import logging
+
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults, settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.models import KVStore
+
+from core.cache import bump
+
+from .models import Post
+from .settings import THUMBNAIL_MAX_ATTEMPTS, THUMBNAIL_VARIANTS
+
+# Миниатюра, которую выводят карточка и страница поста.
+CARD_THUMBNAIL = THUMBNAIL_VARIANTS[0]
+
+logger = logging.getLogger(__name__)
+
+
+def pending():
+    """Посты с картинкой, миниатюры которых ещё не готовы.
+
+    Картинки, на которых generate ошибся THUMBNAIL_MAX_ATTEMPTS раз,
+    остаются неготовыми, но больше не обрабатываются.
+    """
+    return Post.objects.filter(
+        thumbnail_ready=False, thumbnail_attempts__lt=THUMBNAIL_MAX_ATTEMPTS
+    ).exclude(image='')
+
+
+def generate(image_name):
+    """Готовит все варианты миниатюр; выполняется вне запроса."""
+    try:
+        for geometry, options in THUMBNAIL_VARIANTS:
+            # Нечитаемый исходник sorl не считает ошибкой: он только
+            # пишет в лог и не сохраняет миниатюру в хранилище.
+            if not default.kvstore.get(
+                get_thumbnail(image_name, geometry, **options)
+            ):
+                logger.error(
+                    'Не удалось подготовить миниатюры %s', image_name
+                )
+                return False
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры %s', image_name)
+        return False
+    return True
+
+
+def mark_ready(post_ids):
+    """Отмечает миниатюры готовыми и сбрасывает страницы с этими постами.
+
+    Смена modified меняет ключ закэшированной карточки поста, которая
+    до этого ссылалась на исходную картинку. Записи хранилища в кэше,
+    включая запомненное отсутствие, сбрасываются: следующее чтение
+    возьмёт их из таблицы.
+    """
+    posts = Post.objects.filter(pk__in=post_ids)
+    scopes, keys = {'posts'}, []
+    for username, slug, image in posts.values_list(
+        'author__username', 'group__slug', 'image'
+    ):
+        scopes.add(f'profile:{username}')
+        if slug:
+            scopes.add(f'group:{slug}')
+        keys.extend(
+            add_prefix(_thumbnail_file(image, geometry, options).key)
+            for geometry, options in THUMBNAIL_VARIANTS
+        )
+    posts.update(
+        thumbnail_ready=True, thumbnail_attempts=0, modified=timezone.now()
+    )
+    default.kvstore.cache.delete_many(keys)
+    bump(*scopes)
+
+
+def mark_failed(post_ids):
+    """Засчитывает неудачную попытку; пост остаётся в очереди."""
+    Post.objects.filter(pk__in=post_ids).update(
+        thumbnail_attempts=F('thumbnail_attempts') + 1
+    )
+
+
+def _thumbnail_file(image, geometry, options):
+    """Файл миниатюры по правилам ThumbnailBackend, без обращения к диску.
+
+    Повторяет начало ThumbnailBackend.get_thumbnail и опирается на его
+    закрытые методы, поэтому sorl-thumbnail закреплён в requirements.txt,
+    а совпадение имён с get_thumbnail проверяет test_thumbnails.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(
+        backend._get_thumbnail_filename(source, geometry, options),
+        default.storage
+    )
+
+
+def _stored(files):
+    """Ключи {pk: файл миниатюры}, чьи записи есть в хранилище sorl.
+
+    Вместо отдельного чтения key-value хранилища на каждую миниатюру
+    все ключи читаются из кэша одним get_many, а промахи добираются из
+    таблицы хранилища одним запросом.
+    """
+    keys = {pk: add_prefix(file.key) for pk, file in files.items()}
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in values]
+    if missing:
+        # Отсутствие записи тоже кэшируется, как в _get_raw хранилища sorl,
+        # иначе пропавшая миниатюра читала бы таблицу на каждой странице.
+        found = dict.fromkeys(missing, EMPTY_VALUE)
+        found.update(KVStore.objects.filter(
+            key__in=missing
+        ).values_list('key', 'value'))
+        kv_cache.set_many(found, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+    return {
+        pk for pk, key in keys.items()
+        if values.get(key, EMPTY_VALUE) != EMPTY_VALUE
+    }
+
+
+def thumbnail_urls(posts, variant=CARD_THUMBNAIL):
+    """Адреса готовых миниатюр постов страницы: {pk: url}.
+
+    Если запись хранилища пропала, выводится исходная картинка, а
+    миниатюру заново поставит в очередь generate_thumbnails
+    --requeue-lost: страница ничего не пишет в базу.
+    """
+    geometry, options = variant
+    files = {
+        post.pk: _thumbnail_file(post.image, geometry, options)
+        for post in posts if post.image and post.thumbnail_ready
+    }
+    if not files:
+        return {}
+    return {pk: files[pk].url for pk in _stored(files)}
+
+
+def requeue_lost(batch_size):
+    """Возвращает в очередь посты, записи миниатюр которых пропали."""
+    ready = Post.objects.filter(thumbnail_ready=True).exclude(image='')
+    last, lost = 0, 0
+    while True:
+        batch = list(ready.filter(pk__gt=last).order_by('pk').values_list(
+            'pk', 'image'
+        )[:batch_size])
+        if not batch:
+            return lost
+        last = batch[-1][0]
+        for geometry, options in THUMBNAIL_VARIANTS:
+            files = {
+                pk: _thumbnail_file(image, geometry, options)
+                for pk, image in batch
+            }
+            ids = set(files) - _stored(files)
+            lost += Post.objects.filter(pk__in=ids).update(
+                thumbnail_ready=False, thumbnail_attempts=0
+            )
+            batch = [(pk, image) for pk, image in batch if pk not in ids]
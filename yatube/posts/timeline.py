@@ -0,0 +1,158 @@
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from .models import Celebrity, Follow, Post, Timeline
+from .settings import FANOUT_FOLLOWERS_LIMIT
+
+# Ключ сортировки ленты: дата из записи ленты, а не из поста, чтобы
+# курсорная пагинация шла по индексу (user, pub_date) таблицы ленты.
+FEED_DATE = 'feed_date'
+
+
+def _insert(rows):
+    """Вставляет строки (user, post, pub_date) одним INSERT ... SELECT."""
+    sql, params = rows.query.sql_with_params()
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{Timeline._meta.db_table} (user_id, post_id, pub_date) {sql} '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            params
+        )
+
+
+def _follower_rows(**filters):
+    return Follow.objects.filter(
+        author__celebrity__isnull=True, **filters
+    ).values_list('user_id', 'author__posts__pk', 'author__posts__pub_date')
+
+
+def _has_many_followers(author_id):
+    """Проверка без полного COUNT: читается не больше лимита строк."""
+    return Follow.objects.filter(
+        author_id=author_id
+    )[FANOUT_FOLLOWERS_LIMIT - 1:].exists()
+
+
+def is_celebrity(author_id):
+    return Celebrity.objects.filter(author_id=author_id).exists()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    _insert(_follower_rows(author_id=post.author_id, author__posts=post))
+
+
+def fan_out_bulk(posts):
+    """Досылает в ленты посты, созданные через bulk_create.
+
+    На SQLite bulk_create не возвращает первичные ключи, поэтому посты
+    без ключа выбираются по дате публикации; посты с заданным ключом
+    (например, из импорта) раскладываются как есть.
+    """
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    for author_id, author_posts in by_author.items():
+        if all(post.pk for post in author_posts):
+            _insert(_follower_rows(
+                author_id=author_id,
+                author__posts__in=[post.pk for post in author_posts]
+            ))
+        else:
+            _insert(_follower_rows(
+                author_id=author_id,
+                author__posts__pub_date__gte=min(
+                    post.pub_date for post in author_posts
+                )
+            ))
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика все посты автора."""
+    _insert(_follower_rows(user_id=user_id, author_id=author_id))
+
+
+def redate(post_ids):
+    """Переносит в ленты даты постов, исправленные после раскладки."""
+    Timeline.objects.filter(post_id__in=post_ids).update(pub_date=Subquery(
+        Post.objects.filter(pk=OuterRef('post_id')).values('pub_date')
+    ))
+
+
+def purge(user_id, author_id):
+    """Убирает посты автора из ленты бывшего подписчика."""
+    Timeline.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def follow_created(user_id, author_id):
+    if is_celebrity(author_id):
+        return
+    if _has_many_followers(author_id):
+        Celebrity.objects.get_or_create(author_id=author_id)
+        return
+    backfill(user_id, author_id)
+
+
+def follows_created(pairs):
+    """follow_created для пачки подписок (user_id, author_id) из импорта."""
+    authors = {author_id for _, author_id in pairs}
+    for author_id in authors:
+        if not is_celebrity(author_id) and _has_many_followers(author_id):
+            Celebrity.objects.get_or_create(author_id=author_id)
+    # Лишние пары из декартова произведения уже есть в лентах,
+    # их повторная вставка игнорируется.
+    _insert(_follower_rows(
+        user_id__in={user_id for user_id, _ in pairs}, author_id__in=authors
+    ))
+
+
+def follow_deleted(user_id, author_id):
+    # Популярный автор, потерявший подписчиков, остаётся в Celebrity до
+    # запуска demote_celebrities: заполнять ленты всех его подписчиков
+    # в запросе отписки слишком долго, а до тех пор посты автора
+    # по-прежнему подмешиваются при чтении.
+    purge(user_id, author_id)
+
+
+def demotable():
+    """Популярные авторы, у которых подписчиков стало меньше лимита."""
+    return [
+        author_id for author_id in Celebrity.objects.values_list(
+            'author_id', flat=True
+        ).iterator()
+        if not _has_many_followers(author_id)
+    ]
+
+
+def demote(author_id):
+    """Раскладывает посты автора по лентам всех его подписчиков.
+
+    Удаление из Celebrity и вставка в одной транзакции, чтобы посты
+    автора не пропали из лент между ними.
+    """
+    with transaction.atomic():
+        Celebrity.objects.filter(author_id=author_id).delete()
+        _insert(_follower_rows(author_id=author_id))
+
+
+def feed(user):
+    """Посты авторов, на которых подписан пользователь.
+
+    Обычные авторы читаются из материализованной ленты одним проходом
+    по индексу (user, pub_date), популярные подмешиваются при чтении.
+    """
+    celebrities = list(Follow.objects.filter(
+        user=user, author__celebrity__isnull=False
+    ).values_list('author_id', flat=True))
+    if not celebrities:
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            **{FEED_DATE: F('timeline_entries__pub_date')}
+        ).order_by(f'-{FEED_DATE}', '-pk')
+    return Post.objects.filter(
+        Q(pk__in=Timeline.objects.filter(user=user).values('post'))
+        | Q(author_id__in=celebrities)
+    ).annotate(**{FEED_DATE: F('pub_date')}).order_by(f'-{FEED_DATE}', '-pk')
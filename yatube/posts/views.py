@@ -1,36 +1,64 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
-
-from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
-from .settings import POSTS_PER_PAGE
-
-CACHE_TIME = 20
 
+from core.cache import anonymous_page, versioned_cache_page, versioned_etag
 
-def page_paginator(posts, count_pages, request):
-    return Paginator(posts, count_pages).get_page(request.GET.get('page'))
+from .export import CONTENT_TYPES, export
+from .forms import PostForm, CommentForm
+from .models import Post, User, Follow, Comment
+from .objects import group_or_404, post_or_404, user_or_404
+from .paginator import CursorPaginator
+from .search import SCORE, search
+from .settings import COMMENTS_PER_PAGE, PAGE_CACHE_TIME, POSTS_PER_PAGE
+from .thumbnails import thumbnail_urls
+from .timeline import FEED_DATE, feed
+
+
+def page_paginator(posts, count_pages, request, key='pub_date'):
+    return CursorPaginator(posts, count_pages, key).get_page(
+        request.GET.get('page'), request.GET.get('cursor')
+    )
 
 
-@cache_page(CACHE_TIME, key_prefix='index_page')
+@anonymous_page(PAGE_CACHE_TIME, 'posts', 'groups', personal=True)
+@versioned_etag('posts', 'groups')
+@versioned_cache_page(PAGE_CACHE_TIME, 'index_page', 'posts', 'groups')
 def index(request):
     return render(request, 'posts/index.html', {
-        'page_obj': page_paginator(Post.objects.all(), POSTS_PER_PAGE, request)
+        'page_obj': page_paginator(
+            Post.objects.select_related('author', 'group'),
+            POSTS_PER_PAGE,
+            request
+        )
     })
 
 
+@anonymous_page(PAGE_CACHE_TIME, 'group:{slug}', 'groups', personal=True)
+@versioned_etag('group:{slug}', 'groups')
+@versioned_cache_page(
+    PAGE_CACHE_TIME, 'group_page', 'group:{slug}', 'groups'
+)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = group_or_404(slug)
     return render(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': page_paginator(group.posts.all(), POSTS_PER_PAGE, request)
+        'page_obj': page_paginator(
+            group.posts.select_related('author'), POSTS_PER_PAGE, request
+        )
     })
 
 
+@anonymous_page(PAGE_CACHE_TIME, 'profile:{username}', 'groups')
+@versioned_etag('profile:{username}', 'groups')
+@versioned_cache_page(
+    PAGE_CACHE_TIME, 'profile_page', 'profile:{username}', 'groups'
+)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = user_or_404(username)
     following = ((request.user.is_authenticated and request.user != author)
                  and Follow.objects.filter(author=author).
                  filter(user=request.user).exists())
@@ -42,17 +70,51 @@ def profile(request, username):
         )})
 
 
+def comments_page(post_id, request):
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PER_PAGE,
+        'created'
+    ).get_page(cursor=request.GET.get('cursor'))
+
+
+@anonymous_page(PAGE_CACHE_TIME, 'posts', 'groups', 'post:{post_id}')
+@versioned_etag('posts', 'groups', 'post:{post_id}')
 def post_detail(request, post_id):
     form = CommentForm()
+    post = post_or_404(post_id)
     return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(Post, pk=post_id),
+        'post': post,
+        'comments': comments_page(post_id, request),
+        'thumbnail_url': thumbnail_urls([post]).get(post.pk),
         'form': form
     })
 
 
+@versioned_etag('posts', 'groups', 'post:{post_id}')
+def post_comments(request, post_id):
+    post = post_or_404(post_id)
+    comments = comments_page(post_id, request)
+    if request.GET.get('format') != 'json':
+        return render(request, 'posts/includes/comment_list.html', {
+            'post': post,
+            'comments': comments,
+        })
+    return JsonResponse({
+        'comments': [{
+            'id': comment.pk,
+            'author': comment.author.username,
+            'text': comment.text,
+            'created': comment.created,
+        } for comment in comments],
+        'next_cursor': comments.next_cursor,
+    })
+
+
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = post_or_404(post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -63,6 +125,7 @@ def add_comment(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -77,8 +140,11 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    # Изменяемый пост читается из базы: форма сохраняет все его поля.
+    post = (get_object_or_404(Post, id=post_id) if request.method == 'POST'
+            else post_or_404(post_id))
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post.id)
     form = PostForm(
@@ -97,15 +163,18 @@ def post_edit(request, post_id):
 
 
 @login_required
+@versioned_etag('posts', 'groups', 'feed:{user.pk}')
 def follow_index(request):
     return render(request, 'posts/follow.html', {'page_obj': page_paginator(
-        Post.objects.filter(author__following__user=request.user),
+        feed(request.user).select_related('author', 'group'),
         POSTS_PER_PAGE,
-        request
+        request,
+        FEED_DATE
     )})
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
@@ -116,8 +185,42 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     get_object_or_404(Follow,
                       user=request.user,
                       author__username=username).delete()
     return redirect('posts:profile', username=username)
+
+
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search(query) if query else Post.objects.none()
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'pagination_params': urlencode({'q': query}) + '&',
+        'page_obj': page_paginator(
+            posts.select_related('author', 'group'),
+            POSTS_PER_PAGE,
+            request,
+            SCORE
+        )
+    })
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    output_format = request.GET.get('format')
+    if request.user != author or output_format not in CONTENT_TYPES:
+        return redirect('posts:profile', username=username)
+    compress = 'gzip' in request.GET
+    response = StreamingHttpResponse(
+        export(author, output_format, compress),
+        content_type=(
+            'application/gzip' if compress else CONTENT_TYPES[output_format]
+        )
+    )
+    filename = f'{username}.{output_format}' + ('.gz' if compress else '')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,8 +1,21 @@
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Каталог для файлов, которые сайт пишет во время работы. Тесты получают
+# временный, чтобы не писать в рабочее дерево и в файлы запущенного сайта.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+if TESTING:
+    RUNTIME_DIR = tempfile.mkdtemp(prefix='yatube-tests-')
+    atexit.register(shutil.rmtree, RUNTIME_DIR, ignore_errors=True)
+else:
+    RUNTIME_DIR = os.environ.get('YATUBE_RUNTIME_DIR', BASE_DIR)
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -15,6 +28,11 @@ SECRET_KEY = 'i)j-u09e=fwkh#bgqi!trexn(-7d_y34j@$e5z=z3)=ifc6nv5'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Адреса, с которых доступны /metrics и отладочные страницы.
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -42,11 +60,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilerMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,7 +78,7 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -79,9 +102,40 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Прагмы, которые core.receivers выставляет каждому соединению SQLite:
+# WAL не блокирует читателей на время записи, synchronous=normal
+# в режиме WAL не теряет целостность при сбое процесса.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    # Отрицательное значение — размер в КиБ, здесь 64 МиБ.
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+SQLITE_OPTIMIZE_INTERVAL = 60 * 60
+
+# Реплики только для чтения, копии основной базы (например, Litestream):
+# YATUBE_REPLICAS=/srv/replica1.sqlite3,/srv/replica2.sqlite3
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica_{number}'] = dict(DATABASES['default'], NAME=path)
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# После записи сессия читает из основной базы, пока реплики догоняют.
+REPLICA_PIN_COOKIE = 'primary'
+REPLICA_PIN_SECONDS = 5
+
+# Сколько общие кэши и браузеры хранят страницы для анонимов.
+ANONYMOUS_PAGE_MAX_AGE = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -125,8 +179,54 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Локальный LRU каждого воркера перед общим для воркеров файлом SQLite.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.backends.InstrumentedTwoTierCache',
+        'LOCATION': os.path.join(RUNTIME_DIR, 'cache', 'cache.sqlite3'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 60,
+            # Записи других воркеров видны не позже чем через столько
+            # секунд; чаще журнал общего кэша не читается.
+            'SYNC_INTERVAL': 1,
+        },
     }
 }
+
+# Запросы дольше порога пишутся в LOG_DIR/slow_queries.log.
+SLOW_QUERY_MS = 100
+LOG_DIR = os.path.join(RUNTIME_DIR, 'logs')
+
+# Профили запросов сотрудников, хранятся последние PROFILE_KEEP.
+PROFILE_DIR = os.path.join(RUNTIME_DIR, 'profiles')
+PROFILE_KEEP = 50
+
+# Результаты manage.py bench по умолчанию.
+BENCH_DIR = os.path.join(RUNTIME_DIR, 'bench')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'slow_queries': {'format': '%(asctime)s %(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'core.slow_queries.BufferedRotatingFileHandler',
+            'filename': os.path.join(LOG_DIR, 'slow_queries.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'slow_queries',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}